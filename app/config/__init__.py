@@ -1,6 +1,8 @@
 # Standard library
 import os
+import tempfile
 from logging.config import dictConfig
+from typing import Optional
 
 # Internal modules
 from .logging import LOGGING_CONIFG
@@ -21,9 +23,63 @@ DEFAULT_NO_QUESTIONS: int = 3
 DEFAULT_MIN_DISTANCE: int = 1000
 DEFAULT_MAX_DISTANCE: int = 3000
 MAX_ANSWER_DISTANCE: int = 10
+ROUTE_SEARCH_BUDGET: int = int(os.getenv("ROUTE_SEARCH_BUDGET", "10000"))
+QUESTION_INDEX_ENABLED: bool = os.getenv("QUESTION_INDEX_ENABLED", "1") == "1"
+QUESTION_SNAPSHOT_DIR: str = os.getenv(
+    "QUESTION_SNAPSHOT_DIR",
+    os.path.join(tempfile.gettempdir(), "game-service", "question-snapshot"),
+)
+QUESTION_SNAPSHOT_MAX_DELTA: float = float(
+    os.getenv("QUESTION_SNAPSHOT_MAX_DELTA", "0.1")
+)
+
+POSITION_BATCH_MAX_SIZE: int = int(os.getenv("POSITION_BATCH_MAX_SIZE", "100"))
+POSITION_MAX_CLOCK_SKEW: int = int(os.getenv("POSITION_MAX_CLOCK_SKEW", "60"))
+POSITION_WRITE_BEHIND: bool = os.getenv("POSITION_WRITE_BEHIND", "0") == "1"
+POSITION_BUFFER_FLUSH_SIZE: int = int(os.getenv("POSITION_BUFFER_FLUSH_SIZE", "500"))
+POSITION_BUFFER_FLUSH_INTERVAL: float = float(
+    os.getenv("POSITION_BUFFER_FLUSH_INTERVAL", "2.0")
+)
+POSITION_BUFFER_MAX_SIZE: int = int(os.getenv("POSITION_BUFFER_MAX_SIZE", "5000"))
+
+POSITION_MIN_DISTANCE: int = int(os.getenv("POSITION_MIN_DISTANCE", "0"))
+POSITION_MIN_INTERVAL: float = float(os.getenv("POSITION_MIN_INTERVAL", "0"))
+POSITION_SAMPLING_CACHE_SIZE: int = int(
+    os.getenv("POSITION_SAMPLING_CACHE_SIZE", "10000")
+)
+POSITION_SAMPLING_CACHE_TTL: int = int(os.getenv("POSITION_SAMPLING_CACHE_TTL", "600"))
+
+GAME_STATE_CACHE_SIZE: int = int(os.getenv("GAME_STATE_CACHE_SIZE", "1000"))
+GAME_STATE_CACHE_TTL: int = int(os.getenv("GAME_STATE_CACHE_TTL", "5"))
+
+GEOFENCE_CACHE_SIZE: int = int(os.getenv("GEOFENCE_CACHE_SIZE", "10000"))
+GEOFENCE_CACHE_TTL: int = int(os.getenv("GEOFENCE_CACHE_TTL", "3600"))
 
 USER_CACHE_SIZE: int = int(os.getenv("USER_CACHE_SIZE", "1000"))
 USER_CACHE_TTL: int = int(os.getenv("USER_CACHE_TTL", "600"))
+USER_CACHE_SOFT_TTL: int = int(os.getenv("USER_CACHE_SOFT_TTL", "300"))
+USER_NEGATIVE_CACHE_TTL: int = int(os.getenv("USER_NEGATIVE_CACHE_TTL", "10"))
+USER_CACHE_PATH: Optional[str] = os.getenv("USER_CACHE_PATH")
+USER_FETCH_WORKERS: int = int(os.getenv("USER_FETCH_WORKERS", "4"))
+USER_FETCH_BATCH_SIZE: int = int(os.getenv("USER_FETCH_BATCH_SIZE", "50"))
+USER_FETCH_DEADLINE: float = float(os.getenv("USER_FETCH_DEADLINE", "2.0"))
+USER_REFRESH_WORKERS: int = int(os.getenv("USER_REFRESH_WORKERS", "1"))
+USER_SERVICE_POOL_SIZE: int = int(os.getenv("USER_SERVICE_POOL_SIZE", "10"))
+USER_SERVICE_CONNECT_TIMEOUT: float = float(
+    os.getenv("USER_SERVICE_CONNECT_TIMEOUT", "0.5")
+)
+USER_SERVICE_READ_TIMEOUT: float = float(os.getenv("USER_SERVICE_READ_TIMEOUT", "2.0"))
+USER_LAST_KNOWN_CACHE_SIZE: int = int(os.getenv("USER_LAST_KNOWN_CACHE_SIZE", "10000"))
+USER_CIRCUIT_FAILURE_RATE: float = float(os.getenv("USER_CIRCUIT_FAILURE_RATE", "0.5"))
+USER_CIRCUIT_SLOW_CALL_DURATION: float = float(
+    os.getenv("USER_CIRCUIT_SLOW_CALL_DURATION", "1.0")
+)
+USER_CIRCUIT_MIN_CALLS: int = int(os.getenv("USER_CIRCUIT_MIN_CALLS", "10"))
+USER_CIRCUIT_WINDOW: float = float(os.getenv("USER_CIRCUIT_WINDOW", "30"))
+USER_CIRCUIT_OPEN_DURATION: float = float(os.getenv("USER_CIRCUIT_OPEN_DURATION", "15"))
+
+SEEN_QUESTIONS_CACHE_SIZE: int = int(os.getenv("SEEN_QUESTIONS_CACHE_SIZE", "10000"))
+SEEN_QUESTIONS_CACHE_TTL: int = int(os.getenv("SEEN_QUESTIONS_CACHE_TTL", "600"))
 
 
 class AppConfig:
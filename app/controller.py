@@ -11,6 +11,7 @@ from crazerace.http.error import BadRequestError
 from crazerace.http.instrumentation import trace
 
 # Internal modules
+from app.config import POSITION_BATCH_MAX_SIZE
 from app.service import health
 from app.service import health, game_service
 from app.models.dto import QuestionDTO, CreateGameDTO, CoordinateDTO, PositionDTO
@@ -124,6 +125,25 @@ def add_position(game_id: str, member_id: str) -> flask.Response:
     return http.create_response(result.todict())
 
 
+@trace("controller")
+def add_positions(game_id: str, member_id: str) -> flask.Response:
+    user_id = request.user_id
+    raw_positions = get_request_body("positions")["positions"]
+    if not isinstance(raw_positions, list) or not raw_positions:
+        raise BadRequestError("Positions must be a non empty list")
+    if len(raw_positions) > POSITION_BATCH_MAX_SIZE:
+        raise BadRequestError(
+            f"At most {POSITION_BATCH_MAX_SIZE} positions can be added at once"
+        )
+    positions = [PositionDTO.fromdict(member_id, raw) for raw in raw_positions]
+    if len(raw_positions) > 1 and any("createdAt" not in raw for raw in raw_positions):
+        raise BadRequestError("Positions in a batch must have createdAt")
+    if any(a.created_at > b.created_at for a, b in zip(positions, positions[1:])):
+        raise BadRequestError("Positions must be in chronological order")
+    result = position_service.add_positions(game_id, user_id, member_id, positions)
+    return http.create_response(result.todict())
+
+
 def _get_coordinate_from_query() -> CoordinateDTO:
     try:
         return CoordinateDTO(
@@ -5,14 +5,18 @@ from typing import List, Optional
 
 # Internal modules
 from app import db
-from .dto import CoordinateDTO
+from .dto import CoordinateDTO, MemberStateDTO
+from .types import UUID
 
 
 class Position(db.Model):  # type: ignore
     __tablename__ = "game_member_position"
-    id: str = db.Column(db.String(50), primary_key=True)
+    __table_args__ = (
+        db.Index("ix_game_member_position_game_member_id", "game_member_id"),
+    )
+    id: str = db.Column(UUID, primary_key=True)
     game_member_id: str = db.Column(
-        db.String(50), db.ForeignKey("game_member.id"), nullable=False
+        UUID, db.ForeignKey("game_member.id"), nullable=False
     )
     latitude: float = db.Column(db.Float, nullable=False)
     longitude: float = db.Column(db.Float, nullable=False)
@@ -36,16 +40,21 @@ class GameMemberQuestion(db.Model):  # type: ignore
         db.UniqueConstraint(
             "member_id", "game_question_id", name="unique_member_id_game_question_id"
         ),
+        db.Index("ix_game_member_question_game_question_id", "game_question_id"),
+        db.Index(
+            "ix_game_member_question_member_id_unanswered",
+            "member_id",
+            postgresql_where=db.text("answered_at IS NULL"),
+            sqlite_where=db.text("answered_at IS NULL"),
+        ),
     )
     id: int = db.Column(db.Integer, primary_key=True)
-    member_id: str = db.Column(
-        db.String(50), db.ForeignKey("game_member.id"), nullable=False
-    )
+    member_id: str = db.Column(UUID, db.ForeignKey("game_member.id"), nullable=False)
     game_question_id: int = db.Column(
         db.Integer, db.ForeignKey("game_question.id"), nullable=False
     )
     position_id: Optional[str] = db.Column(
-        db.String(50), db.ForeignKey("game_member_position.id"), nullable=True
+        UUID, db.ForeignKey("game_member_position.id"), nullable=True
     )
     answered_at: Optional[datetime] = db.Column(db.DateTime, nullable=True)
     created_at: datetime = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
@@ -65,8 +74,8 @@ class GameMember(db.Model):  # type: ignore
     __table_args__ = (
         db.UniqueConstraint("game_id", "user_id", name="unique_game_id_user_id"),
     )
-    id: str = db.Column(db.String(50), primary_key=True)
-    game_id: str = db.Column(db.String(50), db.ForeignKey("game.id"), nullable=False)
+    id: str = db.Column(UUID, primary_key=True)
+    game_id: str = db.Column(UUID, db.ForeignKey("game.id"), nullable=False)
     user_id: str = db.Column(db.String(50), nullable=False)
     is_admin: bool = db.Column(db.Boolean, nullable=False, default=False)
     is_ready: bool = db.Column(db.Boolean, nullable=False, default=False)
@@ -90,7 +99,10 @@ class GameMember(db.Model):  # type: ignore
 
 
 class Question(db.Model):  # type: ignore
-    id: str = db.Column(db.String(50), primary_key=True)
+    __table_args__ = (
+        db.Index("ix_question_latitude_longitude", "latitude", "longitude"),
+    )
+    id: str = db.Column(UUID, primary_key=True)
     latitude: float = db.Column(db.Float, nullable=False)
     longitude: float = db.Column(db.Float, nullable=False)
     text: str = db.Column(db.Text, nullable=False)
@@ -116,11 +128,10 @@ class Question(db.Model):  # type: ignore
 
 
 class GameQuestion(db.Model):  # type: ignore
+    __table_args__ = (db.Index("ix_game_question_game_id", "game_id"),)
     id: int = db.Column(db.Integer, primary_key=True)
-    game_id: str = db.Column(db.String(50), db.ForeignKey("game.id"), nullable=False)
-    question_id: str = db.Column(
-        db.String(50), db.ForeignKey("question.id"), nullable=False
-    )
+    game_id: str = db.Column(UUID, db.ForeignKey("game.id"), nullable=False)
+    question_id: str = db.Column(UUID, db.ForeignKey("question.id"), nullable=False)
 
     def __repr__(self) -> str:
         return f"GameQuestion(game_id={self.game_id} question_id={self.question_id})"
@@ -132,10 +143,8 @@ class Placement(db.Model):  # type: ignore
         db.UniqueConstraint("game_id", "member_id", name="unique_game_id_member_id"),
     )
     id: int = db.Column(db.Integer, primary_key=True)
-    game_id: str = db.Column(db.String(50), db.ForeignKey("game.id"), nullable=False)
-    member_id: str = db.Column(
-        db.String(50), db.ForeignKey("game_member.id"), nullable=False
-    )
+    game_id: str = db.Column(UUID, db.ForeignKey("game.id"), nullable=False)
+    member_id: str = db.Column(UUID, db.ForeignKey("game_member.id"), nullable=False)
     created_at: datetime = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
 
     def __repr__(self) -> str:
@@ -148,7 +157,7 @@ class Placement(db.Model):  # type: ignore
 
 
 class Game(db.Model):  # type: ignore
-    id: str = db.Column(db.String(50), primary_key=True)
+    id: str = db.Column(UUID, primary_key=True)
     name: str = db.Column(db.String(100), nullable=False)
     started_at: Optional[datetime] = db.Column(db.DateTime, nullable=True)
     ended_at: Optional[datetime] = db.Column(db.DateTime, nullable=True)
@@ -167,3 +176,11 @@ class Game(db.Model):  # type: ignore
             f"ended_at={self.ended_at}, "
             f"created_at={self.created_at})"
         )
+
+
+@dataclass(frozen=True)
+class PositionContext:
+    game_id: str
+    member: Optional[MemberStateDTO]
+    question_count: int
+    is_cached: bool = False
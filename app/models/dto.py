@@ -1,13 +1,14 @@
 # Standard library
 from dataclasses import dataclass
-from datetime import datetime
+from datetime import datetime, timedelta
 from typing import Any, Dict, List, Optional
-from uuid import uuid4
+from uuid import UUID, uuid4
 
 # 3rd party libraries
 from crazerace.http.error import BadRequestError
 
 # Internal modules
+from app.config import DATETIME_FORMAT, POSITION_MAX_CLOCK_SKEW
 from app.models.external import UserDTO
 
 
@@ -40,7 +41,7 @@ class QuestionDTO:
 
     @classmethod
     def fromdict(cls, raw: Dict[str, Any]) -> "QuestionDTO":
-        question_id = raw.get("id") or _new_id()
+        question_id = _parse_id(raw)
         latitude = raw["latitude"]
         longitude = raw["longitude"]
         text = raw["text"]
@@ -87,6 +88,16 @@ class QuestionDTO:
         )
 
 
+@dataclass(frozen=True)
+class QuestionCoordinateDTO:
+    id: str
+    latitude: float
+    longitude: float
+
+    def coordinate(self) -> "CoordinateDTO":
+        return CoordinateDTO(latitude=self.latitude, longitude=self.longitude)
+
+
 @dataclass
 class CreateGameDTO:
     game_id: str
@@ -98,9 +109,7 @@ class CreateGameDTO:
         name = raw["name"]
         if not (isinstance(name, str)):
             raise BadRequestError("Incorrect field types")
-        return cls(
-            game_id=raw.get("id") or _new_id(), name=name, created_at=datetime.utcnow()
-        )
+        return cls(game_id=_parse_id(raw), name=name, created_at=datetime.utcnow())
 
 
 @dataclass
@@ -162,6 +171,29 @@ class GameInfoDTO:
         return {"id": self.id, "name": self.name}
 
 
+@dataclass(frozen=True)
+class ActiveQuestionDTO:
+    member_question_id: int
+    question: QuestionCoordinateDTO
+
+
+@dataclass(frozen=True)
+class MemberStateDTO:
+    id: str
+    game_id: str
+    user_id: str
+    is_resigned: bool
+    answered_count: int
+    active_question: Optional[ActiveQuestionDTO] = None
+
+
+@dataclass(frozen=True)
+class GameStateDTO:
+    id: str
+    questions: List[QuestionCoordinateDTO]
+    members: Dict[str, MemberStateDTO]
+
+
 @dataclass(frozen=True)
 class PositionDTO:
     id: str
@@ -172,15 +204,17 @@ class PositionDTO:
 
     @classmethod
     def fromdict(cls, member_id: str, raw: Dict[str, Any]) -> "PositionDTO":
+        if not isinstance(raw, dict):
+            raise BadRequestError("Position must be an object")
         try:
             return cls(
-                id=raw["id"] if "id" in raw else _new_id(),
+                id=_parse_id(raw),
                 game_member_id=member_id,
                 latitude=float(raw["latitude"]),
                 longitude=float(raw["longitude"]),
-                created_at=datetime.utcnow(),
+                created_at=_parse_fix_time(raw.get("createdAt")),
             )
-        except (KeyError, ValueError) as e:
+        except (KeyError, ValueError, TypeError) as e:
             raise BadRequestError("Incorrect values of longitude or latitude")
 
 
@@ -202,11 +236,67 @@ class PositionResultDTO:
         }
 
 
+@dataclass(frozen=True)
+class PositionBatchResultDTO:
+    result: PositionResultDTO
+    answer_index: Optional[int] = None
+
+    def todict(self) -> Dict[str, Any]:
+        return {**self.result.todict(), "answerIndex": self.answer_index}
+
+
 @dataclass(frozen=True)
 class CoordinateDTO:
     latitude: float
     longitude: float
 
 
+@dataclass(frozen=True)
+class BoundingBoxDTO:
+    min_latitude: float
+    min_longitude: float
+    max_latitude: float
+    max_longitude: float
+
+    def contains(self, latitude: float, longitude: float) -> bool:
+        return (
+            self.min_latitude <= latitude <= self.max_latitude
+            and self.min_longitude <= longitude <= self.max_longitude
+        )
+
+
 def _new_id() -> str:
     return str(uuid4()).lower()
+
+
+def _parse_fix_time(raw_time: Any) -> datetime:
+    """Parses the client time of a position fix, defaulting to the current time.
+
+    :param raw_time: Time formatted as DATETIME_FORMAT, in UTC.
+    :return: Time of the fix.
+    """
+    now = datetime.utcnow()
+    if raw_time is None:
+        return now
+    try:
+        fix_time = datetime.strptime(raw_time, DATETIME_FORMAT)
+    except (TypeError, ValueError):
+        raise BadRequestError(f"createdAt must be formatted as {DATETIME_FORMAT}")
+    if fix_time > now + timedelta(seconds=POSITION_MAX_CLOCK_SKEW):
+        raise BadRequestError("createdAt is in the future")
+    return fix_time
+
+
+def _parse_id(raw: Dict[str, Any]) -> str:
+    """Parses a client supplied id, which must be a UUID, or creates a new id.
+
+    :param raw: Dict that may hold the id.
+    :return: Lowercase UUID string.
+    """
+    raw_id = raw.get("id")
+    if not raw_id:
+        return _new_id()
+    try:
+        return str(UUID(raw_id))
+    except (TypeError, ValueError, AttributeError):
+        raise BadRequestError("Id must be a UUID")
@@ -0,0 +1,39 @@
+# Standard library
+import uuid
+from typing import Any, Optional
+
+# 3rd party libraries
+from sqlalchemy import String
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.engine.interfaces import Dialect
+from sqlalchemy.types import TypeDecorator, TypeEngine
+
+
+class UUID(TypeDecorator):
+    """UUID handled as a lowercase string.
+
+    Stored as a native 16 byte uuid on Postgres and as a string on other
+    databases, such as SQLite in test mode.
+    """
+
+    impl = String(50)
+
+    def load_dialect_impl(self, dialect: Dialect) -> TypeEngine:
+        if dialect.name == "postgresql":
+            return dialect.type_descriptor(postgresql.UUID(as_uuid=False))
+        return dialect.type_descriptor(String(50))
+
+    def process_bind_param(self, value: Any, dialect: Dialect) -> Optional[str]:
+        if value is None or dialect.name != "postgresql":
+            return value
+        try:
+            return str(uuid.UUID(str(value)))
+        except ValueError:
+            # Malformed ids cannot be cast to uuid, so they are bound as NULL,
+            # which matches no rows, rather than failing the query.
+            return None
+
+    def process_result_value(self, value: Any, dialect: Dialect) -> Optional[str]:
+        if value is None or dialect.name != "postgresql":
+            return value
+        return str(value).lower()
@@ -1,7 +1,8 @@
 # Standard libraries
 import logging
 from datetime import datetime
-from typing import List, Optional
+from typing import Dict, List, Optional, Tuple
+from uuid import UUID
 
 # 3rd party libraries
 from crazerace.http.error import ConflictError, InternalServerError
@@ -9,12 +10,20 @@ from crazerace.http.instrumentation import trace
 
 # Internal modules
 from app import db
-from app.models import Game, GameQuestion, GameMember
+from app.models import Game, GameQuestion, GameMember, GameMemberQuestion, Question
+from app.models.dto import (
+    ActiveQuestionDTO,
+    GameStateDTO,
+    MemberStateDTO,
+    QuestionCoordinateDTO,
+)
 from .util import handle_error
 
 
 _log = logging.getLogger(__name__)
 
+_HEX_DIGITS = set("0123456789abcdef")
+
 
 @trace("game_repo")
 @handle_error(logger=_log, integrity_error_class=ConflictError)
@@ -43,10 +52,82 @@ def find(id: str) -> Optional[Game]:
     return Game.query.filter(Game.id == id).first()
 
 
+@trace("game_repo")
+def find_live_state(id: str) -> Optional[GameStateDTO]:
+    """Finds the state of a started game that has not ended.
+
+    :param id: Id of the game.
+    :return: GameStateDTO or None if no such game exists.
+    """
+    game_exists = (
+        db.session.query(Game.id)
+        .filter(Game.id == id, Game.started_at.isnot(None), Game.ended_at.is_(None))
+        .first()
+    )
+    if not game_exists:
+        return None
+    questions = (
+        db.session.query(
+            GameQuestion.id, Question.id, Question.latitude, Question.longitude
+        )
+        .join(Question)
+        .filter(GameQuestion.game_id == id)
+        .order_by(GameQuestion.id)
+        .all()
+    )
+    coordinates = {
+        game_question_id: QuestionCoordinateDTO(id=q_id, latitude=lat, longitude=lon)
+        for game_question_id, q_id, lat, lon in questions
+    }
+    member_questions = (
+        db.session.query(
+            GameMemberQuestion.id,
+            GameMemberQuestion.member_id,
+            GameMemberQuestion.game_question_id,
+            GameMemberQuestion.answered_at,
+        )
+        .join(GameMember)
+        .filter(GameMember.game_id == id)
+        .all()
+    )
+    answered_counts: Dict[str, int] = {}
+    active_questions: Dict[str, ActiveQuestionDTO] = {}
+    for member_question_id, member_id, game_question_id, answered_at in member_questions:
+        if answered_at is not None:
+            answered_counts[member_id] = answered_counts.get(member_id, 0) + 1
+        elif game_question_id in coordinates:
+            active_questions[member_id] = ActiveQuestionDTO(
+                member_question_id=member_question_id,
+                question=coordinates[game_question_id],
+            )
+    members = GameMember.query.filter(GameMember.game_id == id).all()
+    return GameStateDTO(
+        id=id,
+        questions=list(coordinates.values()),
+        members={
+            m.id: MemberStateDTO(
+                id=m.id,
+                game_id=m.game_id,
+                user_id=m.user_id,
+                is_resigned=m.resigned_at is not None,
+                answered_count=answered_counts.get(m.id, 0),
+                active_question=active_questions.get(m.id),
+            )
+            for m in members
+        },
+    )
+
+
 @trace("game_repo")
 def find_by_shortcode(short_code: str) -> Optional[Game]:
+    # Shortcodes are id prefixes, matched as a range of ids so that the primary
+    # key index can be used on native uuids, which do not support LIKE.
+    try:
+        lowest_id, highest_id = _id_prefix_range(short_code)
+    except ValueError:
+        return None
     return Game.query.filter(
-        Game.id.startswith(short_code), Game.started_at == None
+        Game.id.between(lowest_id, highest_id), Game.started_at == None
     ).first()
 
 
@@ -62,3 +143,10 @@ def delete(game: Game) -> None:
 def end(game: Game) -> None:
     game.ended_at = datetime.utcnow()
     db.session.commit()
+
+
+def _id_prefix_range(prefix: str) -> Tuple[str, str]:
+    digits = prefix.lower()
+    if not digits or not set(digits) <= _HEX_DIGITS:
+        raise ValueError(f"Id prefix {prefix} is not hexadecimal")
+    return str(UUID(digits.ljust(32, "0"))), str(UUID(digits.ljust(32, "f")))
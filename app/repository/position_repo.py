@@ -1,13 +1,25 @@
 # Standard libraries
 import logging
-from typing import List
+from datetime import datetime
+from typing import List, Optional
 
 # 3rd party libraries
 from crazerace.http.instrumentation import trace
+from sqlalchemy import and_, func
+from sqlalchemy.orm import aliased
 
 # Internal modules
 from app import db
-from app.models import Position
+from app.models import (
+    Game,
+    GameMember,
+    GameMemberQuestion,
+    GameQuestion,
+    Position,
+    PositionContext,
+    Question,
+)
+from app.models.dto import ActiveQuestionDTO, MemberStateDTO, QuestionCoordinateDTO
 from .util import handle_error
 
 
@@ -21,6 +33,146 @@ def save(position: Position) -> None:
     db.session.commit()
 
 
+@trace("position_repo")
+@handle_error(logger=_log)
+def save_all(positions: List[Position]) -> None:
+    rows = [
+        {
+            "id": p.id,
+            "game_member_id": p.game_member_id,
+            "latitude": p.latitude,
+            "longitude": p.longitude,
+            "created_at": p.created_at,
+        }
+        for p in positions
+    ]
+    db.session.execute(Position.__table__.insert().values(rows))
+    db.session.commit()
+
+
+@trace("position_repo")
+@handle_error(logger=_log)
+def save_answer(position: Position, member_question_id: int) -> bool:
+    """Saves a position as the answer to a member question, unless the question
+    has already been answered, in which case the position is saved as is.
+
+    :param position: Position answering the question.
+    :param member_question_id: Id of the member question.
+    :return: Boolean indicating if the position answered the question.
+    """
+    db.session.add(position)
+    db.session.flush()
+    answered = (
+        GameMemberQuestion.query.filter(
+            GameMemberQuestion.id == member_question_id,
+            GameMemberQuestion.answered_at.is_(None),  #  type: ignore
+        ).update(
+            {"answered_at": datetime.utcnow(), "position_id": position.id},
+            synchronize_session=False,
+        )
+        == 1
+    )
+    db.session.commit()
+    return answered
+
+
+@trace("position_repo")
+def find_position_context(game_id: str, member_id: str) -> Optional[PositionContext]:
+    """Finds a game member together with the active question of the member
+    and the number of answered and total questions in a single query.
+
+    The member is loaded even if it belongs to another game, so that the caller
+    can tell a missing member from a member of another game.
+
+    :param game_id: Id of the game.
+    :param member_id: Id of the member.
+    :return: PositionContext or None if the game does not exist.
+    """
+    ActiveGameQuestion = aliased(GameQuestion)
+    AnsweredQuestion = aliased(GameMemberQuestion)
+    CountedQuestion = aliased(GameQuestion)
+    answered_count = (
+        db.session.query(func.count(AnsweredQuestion.id))
+        .filter(
+            AnsweredQuestion.member_id == GameMember.id,
+            AnsweredQuestion.answered_at.isnot(None),  #  type: ignore
+        )
+        .correlate(GameMember)
+        .as_scalar()
+    )
+    question_count = (
+        db.session.query(func.count(CountedQuestion.id))
+        .filter(CountedQuestion.game_id == Game.id)
+        .correlate(Game)
+        .as_scalar()
+    )
+    row = (
+        db.session.query(
+            Game.id,
+            GameMember.id,
+            GameMember.game_id,
+            GameMember.user_id,
+            GameMember.resigned_at,
+            GameMemberQuestion.id,
+            Question.id,
+            Question.latitude,
+            Question.longitude,
+            answered_count,
+            question_count,
+        )
+        .select_from(Game)
+        .outerjoin(GameMember, GameMember.id == member_id)
+        .outerjoin(
+            GameMemberQuestion,
+            and_(
+                GameMemberQuestion.member_id == GameMember.id,
+                GameMemberQuestion.answered_at.is_(None),  #  type: ignore
+            ),
+        )
+        .outerjoin(
+            ActiveGameQuestion,
+            ActiveGameQuestion.id == GameMemberQuestion.game_question_id,
+        )
+        .outerjoin(Question, Question.id == ActiveGameQuestion.question_id)
+        .filter(Game.id == game_id)
+        .first()
+    )
+    if not row:
+        return None
+    (
+        game_id,
+        member_id,
+        member_game_id,
+        user_id,
+        resigned_at,
+        member_question_id,
+        question_id,
+        latitude,
+        longitude,
+        answered,
+        total,
+    ) = row
+    member = None
+    if member_id:
+        active_question = None
+        if member_question_id:
+            active_question = ActiveQuestionDTO(
+                member_question_id=member_question_id,
+                question=QuestionCoordinateDTO(
+                    id=question_id, latitude=latitude, longitude=longitude
+                ),
+            )
+        member = MemberStateDTO(
+            id=member_id,
+            game_id=member_game_id,
+            user_id=user_id,
+            is_resigned=resigned_at is not None,
+            answered_count=answered or 0,
+            active_question=active_question,
+        )
+    return PositionContext(game_id=game_id, member=member, question_count=total or 0)
+
+
 @trace("position_repo")
 def find_member_positions(member_id: str) -> List[Position]:
     return Position.query.filter(Position.game_member_id == member_id).all()
@@ -1,12 +1,14 @@
 # Standard libraries
 import logging
 from datetime import datetime
-from typing import Dict, List, Optional
+from typing import Dict, List, Optional, Tuple
 
 # 3rd party libraries
 from crazerace.http.error import ConflictError, InternalServerError
 from crazerace.http.instrumentation import trace
-from sqlalchemy import func
+from sqlalchemy import and_, exists, func, select
+from sqlalchemy.orm import aliased
+from sqlalchemy.sql.expression import Exists, Select
 
 # Internal modules
 from app import db
@@ -18,6 +20,7 @@ from app.models import (
     GameMemberQuestion,
     Position,
 )
+from app.models.dto import BoundingBoxDTO, QuestionCoordinateDTO
 from .util import handle_error
 
 
@@ -39,36 +42,81 @@ def find_all(except_ids: List[str] = []) -> List[Question]:
 
 
 @trace("question_repo")
-def find_previous_question_ids(game: Game) -> List[str]:
-    user_ids = [m.user_id for m in game.members]
+def find_all_coordinates() -> List[QuestionCoordinateDTO]:
+    res = db.session.query(Question.id, Question.latitude, Question.longitude).all()
+    return [_to_coordinate_dto(row) for row in res]
+
+
+@trace("question_repo")
+def find_coordinates_within(
+    bounds: BoundingBoxDTO, except_previous_for_game: Optional[str] = None
+) -> List[QuestionCoordinateDTO]:
+    query = db.session.query(Question.id, Question.latitude, Question.longitude).filter(
+        Question.latitude.between(bounds.min_latitude, bounds.max_latitude),
+        Question.longitude.between(bounds.min_longitude, bounds.max_longitude),
+    )
+    if except_previous_for_game:
+        query = query.filter(~_played_by_members_of(except_previous_for_game))
+    return [_to_coordinate_dto(row) for row in query.all()]
+
+
+@trace("question_repo")
+def find_catalog_version() -> Tuple[int, Optional[datetime]]:
+    count, latest = db.session.query(
+        func.count(Question.id), func.max(Question.created_at)
+    ).one()
+    return count, latest
+
+
+@trace("question_repo")
+def find_played_question_ids(user_ids: List[str]) -> Dict[str, List[str]]:
     res = (
-        db.session.query(GameQuestion, GameMember)
-        .filter(GameQuestion.game_id == GameMember.game_id)
+        db.session.query(GameMember.user_id, GameQuestion.question_id)
+        .join(GameQuestion, GameQuestion.game_id == GameMember.game_id)
         .filter(GameMember.user_id.in_(user_ids))  # type: ignore
+        .distinct()
         .all()
     )
-    return list({game_question.question_id for game_question, _ in res})
+    played: Dict[str, List[str]] = {user_id: [] for user_id in user_ids}
+    for user_id, question_id in res:
+        played[user_id].append(question_id)
+    return played
 
 
-# The performance of this probably sucks, should be refactored
 @trace("question_repo")
-def find_members_possible_questions(game_id: str, member_id: str) -> List[Question]:
-    answered_ids = [
-        q.game_question_id
-        for q in GameMemberQuestion.query.filter(
+def find_started_game_counts(user_ids: List[str]) -> Dict[str, int]:
+    res = (
+        db.session.query(GameMember.user_id, func.count(GameMember.game_id))
+        .join(Game, Game.id == GameMember.game_id)
+        .filter(GameMember.user_id.in_(user_ids))  # type: ignore
+        .filter(Game.started_at.isnot(None))  # type: ignore
+        .group_by(GameMember.user_id)
+        .all()
+    )
+    counts: Dict[str, int] = {user_id: 0 for user_id in user_ids}
+    for user_id, count in res:
+        counts[user_id] = count
+    return counts
+
+
+@trace("question_repo")
+def find_members_possible_question_coordinates(
+    game_id: str, member_id: str
+) -> List[QuestionCoordinateDTO]:
+    answered = exists().where(
+        and_(
+            GameMemberQuestion.game_question_id == GameQuestion.id,
             GameMemberQuestion.member_id == member_id,
             GameMemberQuestion.answered_at.isnot(None),  #  type: ignore
-        ).all()
-    ]
-    return (
-        db.session.query(Question)
-        .join(GameQuestion)
-        .filter(
-            GameQuestion.game_id == game_id,
-            GameQuestion.id.notin_(answered_ids),  # type: ignore
         )
+    )
+    res = (
+        db.session.query(Question.id, Question.latitude, Question.longitude)
+        .join(GameQuestion)
+        .filter(GameQuestion.game_id == game_id, ~answered)
         .all()
     )
+    return [_to_coordinate_dto(row) for row in res]
 
 
 @trace("question_repo")
@@ -84,25 +132,6 @@ def find_members_active_question(game_id: str, member_id: str) -> Optional[Quest
     )
 
 
-@trace("question_repo")
-def set_member_question_as_answered(question_id: str, position: Position) -> None:
-    active_question = (
-        GameMemberQuestion.query.join(GameQuestion)
-        .filter(
-            GameMemberQuestion.member_id == position.game_member_id,
-            GameMemberQuestion.answered_at.is_(None),  #  type: ignore
-            GameQuestion.question_id == question_id,
-        )
-        .first()
-    )
-    if not active_question:
-        return InternalServerError("Could not find active question")
-
-    active_question.answered_at = datetime.utcnow()
-    active_question.position_id = position.id
-    db.session.commit()
-
-
 @trace("question_repo")
 def count_answered_questions(game_id: str) -> Dict[str, int]:
     answer_counts = (
@@ -130,3 +159,23 @@ def save_game_member_question(question: GameMemberQuestion) -> None:
 @trace("question_repo")
 def find(id: str) -> Optional[Question]:
     return Question.query.filter(Question.id == id).first()
+
+
+def _to_coordinate_dto(row: Tuple[str, float, float]) -> QuestionCoordinateDTO:
+    question_id, latitude, longitude = row
+    return QuestionCoordinateDTO(id=question_id, latitude=latitude, longitude=longitude)
+
+
+def _played_by_members_of(game_id: str) -> Exists:
+    return exists().where(
+        and_(
+            GameQuestion.question_id == Question.id,
+            GameMember.game_id == GameQuestion.game_id,
+            GameMember.user_id.in_(_member_user_ids(game_id)),  # type: ignore
+        )
+    )
+
+
+def _member_user_ids(game_id: str) -> Select:
+    members = aliased(GameMember)
+    return select([members.user_id]).where(members.game_id == game_id)
@@ -72,6 +72,12 @@ def add_user_position(game_id: str, member_id: str) -> flask.Response:
     return controller.add_position(game_id, member_id)
 
 
+@app.route("/v1/games/<game_id>/members/<member_id>/positions", methods=["POST"])
+@secured(JWT_SECRET)
+def add_user_positions(game_id: str, member_id: str) -> flask.Response:
+    return controller.add_positions(game_id, member_id)
+
+
 @app.route("/v1/questions/<question_id>", methods=["GET"])
 @secured(JWT_SECRET)
 def get_question(question_id: str) -> flask.Response:
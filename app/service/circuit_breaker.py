@@ -0,0 +1,158 @@
+# Standard library
+import logging
+import threading
+import time
+from collections import deque
+from typing import Callable, Deque, Tuple, TypeVar
+
+# 3rd party modules
+from prometheus_client import Counter
+
+
+_log = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+_TRANSITIONS = Counter(
+    "circuit_breaker_transitions_total",
+    "State changes of circuit breakers",
+    ["name", "state"],
+)
+_REJECTED = Counter(
+    "circuit_breaker_rejected_total",
+    "Calls rejected by open circuit breakers",
+    ["name"],
+)
+
+
+class CircuitOpenError(Exception):
+    pass
+
+
+class CircuitBreaker:
+    """Circuit breaker that stops calls to a dependency that keeps failing.
+
+    While closed, the outcome of every call within the last window seconds is
+    recorded, and calls that take longer than slow_call_duration count as
+    failures. Once at least min_calls have been made and the share of failures
+    reaches failure_rate, the breaker opens and rejects calls for open_duration
+    seconds. It then lets a single probe through, which closes the breaker if
+    it succeeds and opens it again if it does not.
+
+    Calls raising an exception count as failures, unless is_failure tells that
+    the exception was caused by the caller rather than by the dependency.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        failure_rate: float,
+        slow_call_duration: float,
+        min_calls: int,
+        window: float,
+        open_duration: float,
+        clock: Callable[[], float] = time.monotonic,
+        is_failure: Callable[[Exception], bool] = lambda e: True,
+    ) -> None:
+        self.name = name
+        self._failure_rate = failure_rate
+        self._slow_call_duration = slow_call_duration
+        self._min_calls = min_calls
+        self._window = window
+        self._open_duration = open_duration
+        self._clock = clock
+        self._is_failure = is_failure
+        self._lock = threading.Lock()
+        self._state = CLOSED
+        self._opened_at = 0.0
+        self._probing = False
+        self._calls: Deque[Tuple[float, bool]] = deque()
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            if self._state == OPEN and self._open_duration_passed():
+                return HALF_OPEN
+            return self._state
+
+    def call(self, fn: Callable[[], T]) -> T:
+        """Calls a function through the breaker and records its outcome.
+
+        :param fn: Function calling the dependency.
+        :return: Result of the function.
+        """
+        is_probe = self._acquire()
+        start = self._clock()
+        failed = True
+        try:
+            result = fn()
+            failed = self._clock() - start >= self._slow_call_duration
+            return result
+        except Exception as e:
+            failed = self._is_failure(e)
+            raise
+        finally:
+            # Also records interrupted calls, so that a probe is never left open.
+            self._record(failed=failed, is_probe=is_probe)
+
+    def reset(self) -> None:
+        """Closes the breaker and forgets all recorded calls."""
+        with self._lock:
+            self._calls.clear()
+            self._probing = False
+            self._state = CLOSED
+
+    def _acquire(self) -> bool:
+        with self._lock:
+            if self._state == CLOSED:
+                return False
+            if self._state == OPEN and self._open_duration_passed():
+                self._transition(HALF_OPEN)
+            if self._state == HALF_OPEN and not self._probing:
+                self._probing = True
+                return True
+        _REJECTED.labels(self.name).inc()
+        raise CircuitOpenError(f"Circuit breaker {self.name} is open")
+
+    def _record(self, failed: bool, is_probe: bool) -> None:
+        with self._lock:
+            if is_probe:
+                self._probing = False
+                if failed:
+                    self._open()
+                else:
+                    self._transition(CLOSED)
+                return
+            if self._state != CLOSED:
+                return
+            now = self._clock()
+            self._calls.append((now, failed))
+            while self._calls[0][0] <= now - self._window:
+                self._calls.popleft()
+            failures = sum(1 for _, call_failed in self._calls if call_failed)
+            if (
+                len(self._calls) >= self._min_calls
+                and failures >= self._failure_rate * len(self._calls)
+            ):
+                self._open()
+
+    def _open(self) -> None:
+        self._calls.clear()
+        self._opened_at = self._clock()
+        self._transition(OPEN)
+
+    def _open_duration_passed(self) -> bool:
+        return self._clock() - self._opened_at >= self._open_duration
+
+    def _transition(self, state: str) -> None:
+        if state == self._state:
+            return
+        _log.warning(
+            f"Circuit breaker {self.name} changed state from={self._state} to={state}"
+        )
+        self._state = state
+        _TRANSITIONS.labels(self.name, state).inc()
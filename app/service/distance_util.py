@@ -1,8 +1,24 @@
+# Standard library
+import math
+from typing import Union
+
 # 3rd party modules
+import numpy as np
 from geopy.distance import geodesic
 
 # Internal modules
-from app.models.dto import CoordinateDTO
+from app.models.dto import BoundingBoxDTO, CoordinateDTO
+
+
+# WGS-84 ellipsoid parameters, same as used by geopy.
+_SEMI_MAJOR_AXIS: float = 6378137.0
+_FLATTENING: float = 1 / 298.257223563
+_SEMI_MINOR_AXIS: float = (1 - _FLATTENING) * _SEMI_MAJOR_AXIS
+_MAX_ITERATIONS: int = 20
+_CONVERGENCE_THRESHOLD: float = 1e-12
+# Lower bounds of the length of one degree, used to keep bounding boxes conservative.
+_MIN_METERS_PER_DEGREE_LATITUDE: float = 110_574.0
+_METERS_PER_DEGREE_LONGITUDE_AT_EQUATOR: float = 111_319.0
 
 
 def is_within(
@@ -43,3 +59,173 @@ def calculate(origin: CoordinateDTO, destination: CoordinateDTO) -> int:
     destination_tuple = (destination.latitude, destination.longitude)
     distance = geodesic(origin_tuple, destination_tuple)
     return round(distance.meters)
+
+
+def is_within_many(
+    origin: CoordinateDTO,
+    latitudes: np.ndarray,
+    longitudes: np.ndarray,
+    max_dist: int,
+    min_dist: int = 0,
+) -> np.ndarray:
+    """Checks which destinations are within a specified distance of the origin.
+
+    :param origin: CoordinateDTO to calculate distances from.
+    :param latitudes: Array of destination latitudes.
+    :param longitudes: Array of destination longitudes.
+    :param max_dist: Maximum distance in meters.
+    :param min_dist: Minimum distance in meters.
+    :return: Boolean array, one element per destination.
+    """
+    dists = calculate_many(origin, latitudes, longitudes)
+    return (min_dist <= dists) & (dists <= max_dist)
+
+
+def is_at_least_many(
+    origin: CoordinateDTO, latitudes: np.ndarray, longitudes: np.ndarray, min_dist: int
+) -> np.ndarray:
+    """Checks which destinations are at least a specified distance from the origin.
+
+    :param origin: CoordinateDTO to calculate distances from.
+    :param latitudes: Array of destination latitudes.
+    :param longitudes: Array of destination longitudes.
+    :param min_dist: Minimum distance in meters.
+    :return: Boolean array, one element per destination.
+    """
+    dists = calculate_many(origin, latitudes, longitudes)
+    return min_dist < dists
+
+
+def calculate_many(
+    origin: CoordinateDTO, latitudes: np.ndarray, longitudes: np.ndarray
+) -> np.ndarray:
+    """Calculates the distances in meters between one origin and many destinations.
+
+    Uses a vectorized form of Vincenty's inverse formula on the WGS-84 ellipsoid,
+    which agrees with geopy's geodesic distance to well below a meter.
+
+    :param origin: CoordinateDTO to calculate distances from.
+    :param latitudes: Array of destination latitudes.
+    :param longitudes: Array of destination longitudes.
+    :return: Array of distances in meters, rounded to whole meters.
+    """
+    return _calculate_vincenty(origin.latitude, origin.longitude, latitudes, longitudes)
+
+
+def calculate_pairs(
+    origin_latitudes: np.ndarray,
+    origin_longitudes: np.ndarray,
+    latitudes: np.ndarray,
+    longitudes: np.ndarray,
+) -> np.ndarray:
+    """Calculates the distances in meters between pairs of origins and destinations.
+
+    :param origin_latitudes: Array of origin latitudes.
+    :param origin_longitudes: Array of origin longitudes.
+    :param latitudes: Array of destination latitudes, one per origin.
+    :param longitudes: Array of destination longitudes, one per origin.
+    :return: Array of distances in meters, rounded to whole meters.
+    """
+    return _calculate_vincenty(
+        np.asarray(origin_latitudes, dtype=np.float64),
+        np.asarray(origin_longitudes, dtype=np.float64),
+        latitudes,
+        longitudes,
+    )
+
+
+def _calculate_vincenty(
+    origin_latitudes: Union[float, np.ndarray],
+    origin_longitudes: Union[float, np.ndarray],
+    latitudes: np.ndarray,
+    longitudes: np.ndarray,
+) -> np.ndarray:
+    lat_1 = np.radians(origin_latitudes)
+    lat_2 = np.radians(np.asarray(latitudes, dtype=np.float64))
+    lon_delta = np.radians(
+        np.asarray(longitudes, dtype=np.float64) - origin_longitudes
+    )
+
+    u_1 = np.arctan((1 - _FLATTENING) * np.tan(lat_1))
+    u_2 = np.arctan((1 - _FLATTENING) * np.tan(lat_2))
+    sin_u1, cos_u1 = np.sin(u_1), np.cos(u_1)
+    sin_u2, cos_u2 = np.sin(u_2), np.cos(u_2)
+
+    lam = lon_delta
+    sin_sigma = cos_sigma = sigma = cos_sq_alpha = cos_2sigma_m = np.zeros_like(lam)
+    for _ in range(_MAX_ITERATIONS):
+        sin_lam, cos_lam = np.sin(lam), np.cos(lam)
+        sin_sigma = np.hypot(cos_u2 * sin_lam, cos_u1 * sin_u2 - sin_u1 * cos_u2 * cos_lam)
+        cos_sigma = sin_u1 * sin_u2 + cos_u1 * cos_u2 * cos_lam
+        sigma = np.arctan2(sin_sigma, cos_sigma)
+        coincident = sin_sigma == 0
+        safe_sin_sigma = np.where(coincident, 1.0, sin_sigma)
+        sin_alpha = cos_u1 * cos_u2 * sin_lam / safe_sin_sigma
+        cos_sq_alpha = 1 - sin_alpha ** 2
+        equatorial = cos_sq_alpha == 0
+        cos_2sigma_m = np.where(
+            equatorial,
+            0.0,
+            cos_sigma
+            - 2 * sin_u1 * sin_u2 / np.where(equatorial, 1.0, cos_sq_alpha),
+        )
+        c = _FLATTENING / 16 * cos_sq_alpha * (4 + _FLATTENING * (4 - 3 * cos_sq_alpha))
+        previous_lam = lam
+        lam = lon_delta + (1 - c) * _FLATTENING * sin_alpha * (
+            sigma
+            + c
+            * sin_sigma
+            * (cos_2sigma_m + c * cos_sigma * (-1 + 2 * cos_2sigma_m ** 2))
+        )
+        if np.all(np.abs(lam - previous_lam) < _CONVERGENCE_THRESHOLD):
+            break
+
+    u_sq = cos_sq_alpha * (_SEMI_MAJOR_AXIS ** 2 - _SEMI_MINOR_AXIS ** 2) / (
+        _SEMI_MINOR_AXIS ** 2
+    )
+    a = 1 + u_sq / 16384 * (4096 + u_sq * (-768 + u_sq * (320 - 175 * u_sq)))
+    b = u_sq / 1024 * (256 + u_sq * (-128 + u_sq * (74 - 47 * u_sq)))
+    delta_sigma = (
+        b
+        * sin_sigma
+        * (
+            cos_2sigma_m
+            + b
+            / 4
+            * (
+                cos_sigma * (-1 + 2 * cos_2sigma_m ** 2)
+                - b
+                / 6
+                * cos_2sigma_m
+                * (-3 + 4 * sin_sigma ** 2)
+                * (-3 + 4 * cos_2sigma_m ** 2)
+            )
+        )
+    )
+    distances = _SEMI_MINOR_AXIS * a * (sigma - delta_sigma)
+    return np.rint(distances)
+
+
+def bounding_box(origin: CoordinateDTO, distance: float) -> BoundingBoxDTO:
+    """Calculates a bounding box that contains every position within a distance.
+
+    The box is conservative, it may contain positions further away than the
+    distance but never excludes positions within it.
+
+    :param origin: CoordinateDTO at the center of the box.
+    :param distance: Distance in meters from the center.
+    :return: BoundingBoxDTO.
+    """
+    lat_delta = distance / _MIN_METERS_PER_DEGREE_LATITUDE
+    min_lat = max(origin.latitude - lat_delta, -90.0)
+    max_lat = min(origin.latitude + lat_delta, 90.0)
+    widest_cos = math.cos(math.radians(max(abs(min_lat), abs(max_lat))))
+    if widest_cos * _METERS_PER_DEGREE_LONGITUDE_AT_EQUATOR * 180 <= distance:
+        return BoundingBoxDTO(min_lat, -180.0, max_lat, 180.0)
+    lon_delta = distance / (widest_cos * _METERS_PER_DEGREE_LONGITUDE_AT_EQUATOR)
+    return BoundingBoxDTO(
+        min_latitude=min_lat,
+        min_longitude=max(origin.longitude - lon_delta, -180.0),
+        max_latitude=max_lat,
+        max_longitude=min(origin.longitude + lon_delta, 180.0),
+    )
@@ -21,8 +21,10 @@ from app.models.dto import (
     CoordinateDTO,
     GameInfoDTO,
 )
+from app.models.external import UserDTO
 from app.repository import game_repo, member_repo, question_repo
 from app.service import util, question_service, user_service, game_state_util
+from app.service import game_state_cache, seen_questions
 
 
 @trace("game_service")
@@ -47,6 +49,7 @@ def delete_game(game_id: str, user_id: str) -> None:
     game_state_util.assert_user_is_game_admin(user_id, game)
     game_state_util.assert_game_not_started(game)
     game_repo.delete(game)
+    game_state_cache.invalidate(game_id)
 
 
 @trace("game_service")
@@ -77,10 +80,12 @@ def get_game_by_shortcode(short_code: str) -> GameInfoDTO:
 @trace("game_service")
 def start_game(game_id: str, user_id: str, coordinate: CoordinateDTO) -> None:
     game = _find_game_and_assert_can_be_started(game_id, user_id)
-    questions = question_service.find_questions_for_game(game, coordinate)
-    game_questions = _map_questions_to_game(game.id, questions)
+    question_ids = question_service.find_questions_for_game(game, coordinate)
+    game_questions = _map_questions_to_game(game.id, question_ids)
     game_repo.save_questions(game_questions)
+    seen_questions.mark_seen([m.user_id for m in game.members], question_ids)
     game_repo.set_started(game)
+    game_state_cache.invalidate(game_id)
 
 
 @trace("game_service")
@@ -88,13 +93,15 @@ def add_game_member(game_id: str, user_id: str) -> GameMemberDTO:
     game_state_util.assert_game_exists(game_id)
     member = GameMember(id=util.new_id(), game_id=game_id, user_id=user_id)
     member_repo.add_member(member)
-    return _member_to_dto(member)
+    game_state_cache.invalidate(game_id)
+    return _member_to_dto(member, user_service.fetch_user(user_id))
 
 
 @trace("game_service")
 def set_game_member_as_ready(game_id: str, member_id: str, user_id: str) -> None:
     game_state_util.assert_valid_game_member(game_id, member_id, user_id)
     member_repo.set_as_ready(member_id)
+    game_state_cache.invalidate(game_id)
 
 
 @trace("game_service")
@@ -106,6 +113,7 @@ def leave_game(game_id: str, member_id: str, user_id: str) -> None:
         member_repo.delete_member(member)
     else:
         member_repo.set_member_status_as_resigned(member)
+    game_state_cache.invalidate(game_id)
     check_if_game_ended(game)
 
 
@@ -114,6 +122,7 @@ def check_if_game_ended(game: Game) -> bool:
     active_member_ids = [m.id for m in game.members if m.resigned_at == None]
     if len(active_member_ids) == 0:
         game_repo.end(game)
+        game_state_cache.invalidate(game.id)
         return True
     answered = question_repo.count_answered_questions(game.id)
     total_questions = len(game.questions)
@@ -121,6 +130,7 @@ def check_if_game_ended(game: Game) -> bool:
         if member_id not in answered or answered[member_id] != total_questions:
             return False
     game_repo.end(game)
+    game_state_cache.invalidate(game.id)
     return True
 
 
@@ -135,22 +145,23 @@ def _find_game_and_assert_can_be_started(game_id: str, user_id: str) -> Game:
 
 
 def _map_members_to_dtos(members: List[GameMember]) -> List[GameMemberDTO]:
-    return [_member_to_dto(m) for m in members]
+    users = user_service.fetch_users([m.user_id for m in members])
+    return [_member_to_dto(m, users[m.user_id]) for m in members]
 
 
-def _member_to_dto(member: GameMember) -> GameMemberDTO:
+def _member_to_dto(member: GameMember, user: UserDTO) -> GameMemberDTO:
     return GameMemberDTO(
         id=member.id,
         game_id=member.game_id,
-        user=user_service.fetch_user(member.user_id),
+        user=user,
         is_admin=member.is_admin,
         is_ready=member.is_ready,
         created_at=member.created_at,
     )
 
 
-def _map_questions_to_game(game_id: str, questions: List[Question]) -> List[GameQuestion]:
-    return [GameQuestion(game_id=game_id, question_id=q.id) for q in questions]
+def _map_questions_to_game(game_id: str, question_ids: List[str]) -> List[GameQuestion]:
+    return [GameQuestion(game_id=game_id, question_id=q_id) for q_id in question_ids]
 
 
 def _assert_valid_shortcode(short_code: str) -> None:
@@ -0,0 +1,73 @@
+# Standard library
+import threading
+from typing import Optional
+
+# 3rd party modules
+from cachetools import TTLCache
+from crazerace.http.instrumentation import trace
+
+# Internal modules
+from app.config import GAME_STATE_CACHE_SIZE, GAME_STATE_CACHE_TTL
+from app.models import PositionContext
+from app.models.dto import GameStateDTO
+from app.repository import game_repo
+
+
+_lock = threading.Lock()
+_states: TTLCache = TTLCache(maxsize=GAME_STATE_CACHE_SIZE, ttl=GAME_STATE_CACHE_TTL)
+
+
+@trace("game_state_cache")
+def find(game_id: str) -> Optional[GameStateDTO]:
+    """Finds the state of a live game, loading it into the cache if missing.
+
+    The cache is local to each process, so state changed by another process
+    is only seen once the cached entry has expired. The ttl should therefore
+    be kept short.
+
+    :param game_id: Id of the game.
+    :return: GameStateDTO or None if the game is not started or has ended.
+    """
+    with _lock:
+        state = _states.get(game_id)
+    if state:
+        return state
+    state = game_repo.find_live_state(game_id)
+    if state:
+        with _lock:
+            _states[game_id] = state
+    return state
+
+
+@trace("game_state_cache")
+def find_position_context(game_id: str, member_id: str) -> Optional[PositionContext]:
+    """Finds the position context of a member with an active question in a live game.
+
+    :param game_id: Id of the game.
+    :param member_id: Id of the member.
+    :return: PositionContext or None if the member has no active question.
+    """
+    state = find(game_id)
+    member = state.members.get(member_id) if state else None
+    if not state or not member or not member.active_question:
+        return None
+    return PositionContext(
+        game_id=game_id,
+        member=member,
+        question_count=len(state.questions),
+        is_cached=True,
+    )
+
+
+def invalidate(game_id: str) -> None:
+    """Removes the cached state of a game, must be called after every change to it.
+
+    :param game_id: Id of the game.
+    """
+    with _lock:
+        _states.pop(game_id, None)
+
+
+def clear() -> None:
+    with _lock:
+        _states.clear()
@@ -1,5 +1,5 @@
 # Standard library
-from typing import List
+from typing import List, Optional, Union
 from uuid import uuid4
 
 # 3rd party modules
@@ -14,7 +14,7 @@ from crazerace.http.instrumentation import trace
 # Internal modules
 from app.error import GameEndedError
 from app.models import Game, GameMember, GameQuestion, Question
-from app.models.dto import CreateGameDTO, GameDTO, GameMemberDTO
+from app.models.dto import CreateGameDTO, GameDTO, GameMemberDTO, MemberStateDTO
 from app.repository import game_repo, member_repo
 
 
@@ -37,13 +37,23 @@ def assert_active_game_exists(game_id: str) -> Game:
 @trace("game_state_util")
 def assert_valid_game_member(game_id: str, member_id: str, user_id: str) -> GameMember:
     member = member_repo.find(member_id)
+    assert_loaded_game_member(member, game_id, member_id, user_id)
+    return member  # type: ignore
+
+
+@trace("game_state_util")
+def assert_loaded_game_member(
+    member: Optional[Union[GameMember, MemberStateDTO]],
+    game_id: str,
+    member_id: str,
+    user_id: str,
+) -> None:
     if not member:
         raise PreconditionRequiredError(f"Game member with id={member_id} does not exit")
     elif member.user_id != user_id:
         raise ForbiddenError("User ID and member ID is not related")
     elif member.game_id != game_id:
         raise PreconditionRequiredError(f"Member not part of game with id={game_id}")
-    return member
 
 
 @trace("game_state_util")
@@ -0,0 +1,101 @@
+# Standard library
+import threading
+from dataclasses import dataclass
+from typing import Optional
+
+# 3rd party modules
+import numpy as np
+from cachetools import TTLCache
+
+# Internal modules
+from app.config import GEOFENCE_CACHE_SIZE, GEOFENCE_CACHE_TTL, MAX_ANSWER_DISTANCE
+from app.models.dto import BoundingBoxDTO, CoordinateDTO, QuestionCoordinateDTO
+from app.service import distance_util
+
+
+@dataclass(frozen=True)
+class Geofence:
+    question_id: str
+    center: CoordinateDTO
+    radius: int
+    bounds: BoundingBoxDTO
+
+    def contains(self, coordinate: CoordinateDTO) -> bool:
+        """Checks if a position is inside the geofence. The bounding box rules
+        out most positions before any distance is calculated.
+
+        :param coordinate: CoordinateDTO to check.
+        :return: Boolean.
+        """
+        if not self.bounds.contains(coordinate.latitude, coordinate.longitude):
+            return False
+        return distance_util.is_within(self.center, coordinate, self.radius)
+
+    def contains_many(self, latitudes: np.ndarray, longitudes: np.ndarray) -> np.ndarray:
+        """Checks which positions are inside the geofence.
+
+        :param latitudes: Array of latitudes.
+        :param longitudes: Array of longitudes.
+        :return: Boolean array, one element per position.
+        """
+        inside = (
+            (self.bounds.min_latitude <= latitudes)
+            & (latitudes <= self.bounds.max_latitude)
+            & (self.bounds.min_longitude <= longitudes)
+            & (longitudes <= self.bounds.max_longitude)
+        )
+        if inside.any():
+            inside[inside] = distance_util.is_within_many(
+                self.center, latitudes[inside], longitudes[inside], self.radius
+            )
+        return inside
+
+
+_lock = threading.Lock()
+_fences: TTLCache = TTLCache(maxsize=GEOFENCE_CACHE_SIZE, ttl=GEOFENCE_CACHE_TTL)
+
+
+def create(
+    member_id: str, question: QuestionCoordinateDTO, radius: int = MAX_ANSWER_DISTANCE
+) -> Geofence:
+    """Creates and stores the geofence around the active question of a member.
+
+    :param member_id: Id of the member.
+    :param question: Active question of the member.
+    :param radius: Radius of the geofence in meters.
+    :return: Geofence.
+    """
+    center = question.coordinate()
+    fence = Geofence(
+        question_id=question.id,
+        center=center,
+        radius=radius,
+        bounds=distance_util.bounding_box(center, radius),
+    )
+    with _lock:
+        _fences[member_id] = fence
+    return fence
+
+
+def find(member_id: str, question: QuestionCoordinateDTO) -> Geofence:
+    """Finds the geofence of a member's active question, creating it if the
+    member has no stored geofence for the question.
+
+    :param member_id: Id of the member.
+    :param question: Active question of the member.
+    :return: Geofence.
+    """
+    with _lock:
+        fence: Optional[Geofence] = _fences.get(member_id)
+    if fence and fence.question_id == question.id:
+        return fence
+    return create(member_id, question)
+
+
+def remove(member_id: str) -> None:
+    """Removes the geofence of a member.
+
+    :param member_id: Id of the member.
+    """
+    with _lock:
+        _fences.pop(member_id, None)
@@ -0,0 +1,134 @@
+# Standard library
+import math
+from typing import Iterator, List, Tuple
+
+# 3rd party modules
+import numpy as np
+from crazerace.http.instrumentation import trace
+
+# Internal modules
+from app.models.dto import CoordinateDTO
+from app.service import distance_util
+
+
+# Share of a distance that the flat earth approximation may be off by, well above
+# the difference between the mean earth radius and the radii of curvature of the
+# WGS-84 ellipsoid. Pairs closer than this to a link limit are measured exactly.
+_APPROXIMATION_MARGIN: float = 0.02
+_MEAN_EARTH_RADIUS: float = 6_371_008.8
+# Longitude cells are numbered from -18000 to 18000 even for 0.01 degree cells.
+_KEY_STRIDE: int = 1 << 20
+_MAX_PAIRS_PER_CHUNK: int = 1 << 21
+
+
+@trace("neighbour_graph")
+def build(
+    latitudes: np.ndarray, longitudes: np.ndarray, min_link: int, max_link: int
+) -> Tuple[np.ndarray, np.ndarray]:
+    """Builds the graph linking every pair of questions that lie between min_link
+    and max_link meters from each other.
+
+    Questions are bucketed into cells max_link meters high, and each cell is
+    joined with the cells around it in one vectorized step per cell offset.
+
+    :param latitudes: Array of question latitudes, one per row.
+    :param longitudes: Array of question longitudes, one per row.
+    :param min_link: Minimum distance in meters between linked questions.
+    :param max_link: Maximum distance in meters between linked questions.
+    :return: Tuple of the indptr and indices arrays of the graph in compressed
+    sparse row form, the neighbours of row r being indices[indptr[r]:indptr[r + 1]]
+    in ascending order.
+    """
+    latitudes = np.asarray(latitudes, dtype=np.float64)
+    longitudes = np.asarray(longitudes, dtype=np.float64)
+    count = len(latitudes)
+    if count == 0:
+        return np.zeros(1, dtype=np.int32), np.zeros(0, dtype=np.int32)
+    cell_size, lon_reach = _cell_size_and_reach(latitudes, max_link)
+    lat_cells = np.floor(latitudes / cell_size).astype(np.int64)
+    lon_cells = np.floor(longitudes / cell_size).astype(np.int64)
+    keys = lat_cells * _KEY_STRIDE + lon_cells
+    order = np.argsort(keys, kind="stable")
+    cells, starts, sizes = np.unique(keys[order], return_index=True, return_counts=True)
+    edges: List[np.ndarray] = []
+    for lat_offset in range(-1, 2):
+        for lon_offset in range(-lon_reach, lon_reach + 1):
+            neighbour_cells = cells + lat_offset * _KEY_STRIDE + lon_offset
+            found = np.minimum(np.searchsorted(cells, neighbour_cells), len(cells) - 1)
+            joined = cells[found] == neighbour_cells
+            for sources, targets in _row_pairs(
+                np.flatnonzero(joined), found[joined], starts, sizes, order
+            ):
+                linked = _is_linked(
+                    latitudes, longitudes, sources, targets, min_link, max_link
+                )
+                edges.append(sources[linked] * count + targets[linked])
+    sorted_edges = np.sort(np.concatenate(edges))
+    indptr = np.zeros(count + 1, dtype=np.int32)
+    np.cumsum(np.bincount(sorted_edges // count, minlength=count), out=indptr[1:])
+    return indptr, (sorted_edges % count).astype(np.int32)
+
+
+def _cell_size_and_reach(latitudes: np.ndarray, max_link: int) -> Tuple[float, int]:
+    widest_latitude = float(np.abs(latitudes).max())
+    box = distance_util.bounding_box(
+        CoordinateDTO(latitude=widest_latitude, longitude=0.0), max_link
+    )
+    cell_size = widest_latitude - box.min_latitude
+    lon_reach = math.ceil(min(box.max_longitude, 360.0) / cell_size)
+    return cell_size, lon_reach
+
+
+def _row_pairs(
+    from_cells: np.ndarray,
+    to_cells: np.ndarray,
+    starts: np.ndarray,
+    sizes: np.ndarray,
+    order: np.ndarray,
+) -> Iterator[Tuple[np.ndarray, np.ndarray]]:
+    """Expands pairs of cells into all pairs of rows in them, in chunks of a
+    bounded number of pairs.
+    """
+    pair_counts = sizes[from_cells] * sizes[to_cells]
+    chunk_ends = np.cumsum(pair_counts)
+    first = 0
+    while first < len(from_cells):
+        last = max(
+            int(np.searchsorted(chunk_ends, chunk_ends[first] + _MAX_PAIRS_PER_CHUNK)),
+            first + 1,
+        )
+        counts = pair_counts[first:last]
+        block = np.repeat(np.arange(last - first), counts)
+        offsets = np.repeat(np.cumsum(counts) - counts, counts)
+        local = np.arange(int(counts.sum())) - offsets
+        to_sizes = sizes[to_cells[first:last]][block]
+        sources = order[starts[from_cells[first:last]][block] + local // to_sizes]
+        targets = order[starts[to_cells[first:last]][block] + local % to_sizes]
+        yield sources, targets
+        first = last
+
+
+def _is_linked(
+    latitudes: np.ndarray,
+    longitudes: np.ndarray,
+    sources: np.ndarray,
+    targets: np.ndarray,
+    min_link: int,
+    max_link: int,
+) -> np.ndarray:
+    lat_1, lon_1 = latitudes[sources], longitudes[sources]
+    lat_2, lon_2 = latitudes[targets], longitudes[targets]
+    approximate = _MEAN_EARTH_RADIUS * np.hypot(
+        np.radians(lat_2 - lat_1),
+        np.radians(lon_2 - lon_1) * np.cos(np.radians((lat_1 + lat_2) / 2)),
+    )
+    lower, upper = 1 - _APPROXIMATION_MARGIN, 1 + _APPROXIMATION_MARGIN
+    linked = (approximate >= min_link * upper) & (approximate <= max_link * lower)
+    uncertain = np.flatnonzero(
+        (approximate >= min_link * lower) & (approximate <= max_link * upper) & ~linked
+    )
+    distances = distance_util.calculate_pairs(
+        lat_1[uncertain], lon_1[uncertain], lat_2[uncertain], lon_2[uncertain]
+    )
+    linked[uncertain] = (min_link <= distances) & (distances <= max_link)
+    return linked & (sources != targets)
@@ -0,0 +1,171 @@
+# Standard library
+import atexit
+import logging
+import os
+import threading
+import time
+from typing import Callable, List, Optional
+
+# 3rd party modules
+from crazerace.http.instrumentation import trace
+from prometheus_client import Counter, Gauge
+
+# Internal modules
+from app import app
+from app.config import (
+    POSITION_BUFFER_FLUSH_INTERVAL,
+    POSITION_BUFFER_FLUSH_SIZE,
+    POSITION_BUFFER_MAX_SIZE,
+)
+from app.models import Position
+from app.repository import position_repo
+
+
+_log = logging.getLogger(__name__)
+
+_BUFFERED = Counter(
+    "position_buffer_added_total", "Positions added to the write behind buffer"
+)
+_FLUSHED = Counter(
+    "position_buffer_flushed_total", "Positions written to the database by flushes"
+)
+_DROPPED = Counter(
+    "position_buffer_dropped_total", "Positions lost because a flush failed"
+)
+_FLUSHES = Counter(
+    "position_buffer_flushes_total", "Flushes of the write behind buffer", ["reason"]
+)
+_SIZE = Gauge(
+    "position_buffer_size",
+    "Positions waiting in the write behind buffer",
+    multiprocess_mode="livesum",
+)
+
+
+class PositionBuffer:
+    """Bounded write behind buffer of positions.
+
+    Positions are flushed in bulk when flush_size positions have been buffered,
+    when the oldest buffered position is older than flush_interval seconds, or
+    when the buffer is closed. If a flush is already running when the buffer
+    reaches max_size, add blocks until there is room again.
+    """
+
+    def __init__(
+        self,
+        save_all: Callable[[List[Position]], None],
+        flush_size: int = POSITION_BUFFER_FLUSH_SIZE,
+        flush_interval: float = POSITION_BUFFER_FLUSH_INTERVAL,
+        max_size: int = POSITION_BUFFER_MAX_SIZE,
+    ) -> None:
+        self._save_all = save_all
+        self._flush_size = flush_size
+        self._flush_interval = flush_interval
+        self._max_size = max(max_size, flush_size)
+        self._positions: List[Position] = []
+        self._oldest: Optional[float] = None
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._has_room = threading.Condition(self._lock)
+
+    def __len__(self) -> int:
+        return len(self._positions)
+
+    def add(self, position: Position) -> None:
+        """Buffers a position, flushing the buffer if it has reached flush_size.
+
+        :param position: Position to store.
+        """
+        with self._has_room:
+            while len(self._positions) >= self._max_size:
+                self._has_room.wait()
+            self._positions.append(position)
+            if self._oldest is None:
+                self._oldest = time.monotonic()
+            should_flush = len(self._positions) >= self._flush_size
+        _BUFFERED.inc()
+        _SIZE.inc()
+        if should_flush:
+            self.flush("size")
+
+    def flush_if_due(self) -> int:
+        """Flushes the buffer if the oldest position is older than flush_interval.
+
+        :return: Number of flushed positions.
+        """
+        with self._lock:
+            due = (
+                self._oldest is not None
+                and time.monotonic() - self._oldest >= self._flush_interval
+            )
+        return self.flush("interval") if due else 0
+
+    def flush(self, reason: str) -> int:
+        """Writes all buffered positions to the database.
+
+        :param reason: Reason for the flush, used as metric label.
+        :return: Number of flushed positions.
+        """
+        with self._flush_lock:
+            with self._has_room:
+                positions, self._positions = self._positions, []
+                self._oldest = None
+                self._has_room.notify_all()
+            if not positions:
+                return 0
+            _FLUSHES.labels(reason).inc()
+            _SIZE.dec(len(positions))
+            try:
+                self._save_all(positions)
+                _FLUSHED.inc(len(positions))
+            except Exception as e:
+                _DROPPED.inc(len(positions))
+                _log.error(f"Failed to flush {len(positions)} positions: {e}")
+            return len(positions)
+
+
+_lock = threading.Lock()
+_buffer: Optional[PositionBuffer] = None
+_pid: Optional[int] = None
+
+
+@trace("position_buffer")
+def add(position: Position) -> None:
+    """Buffers a position in the write behind buffer of the current process.
+
+    :param position: Position to store.
+    """
+    _get_buffer().add(position)
+
+
+def flush(reason: str = "shutdown") -> None:
+    """Flushes the write behind buffer of the current process, if created.
+
+    :param reason: Reason for the flush, used as metric label.
+    """
+    if _buffer is not None and _pid == os.getpid():
+        with app.app_context():
+            _buffer.flush(reason)
+
+
+def _get_buffer() -> PositionBuffer:
+    global _buffer, _pid
+    with _lock:
+        # Buffers are not shared with forked workers, each process creates its own.
+        if _buffer is None or _pid != os.getpid():
+            _buffer = PositionBuffer(position_repo.save_all)
+            _pid = os.getpid()
+            threading.Thread(
+                target=_flush_periodically, args=(_buffer,), daemon=True
+            ).start()
+        return _buffer
+
+
+def _flush_periodically(buffer: PositionBuffer) -> None:
+    while True:
+        time.sleep(POSITION_BUFFER_FLUSH_INTERVAL / 2)
+        with app.app_context():
+            buffer.flush_if_due()
+
+
+atexit.register(flush)
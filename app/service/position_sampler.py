@@ -0,0 +1,99 @@
+# Standard library
+import threading
+from datetime import datetime
+from typing import List, Optional, Tuple
+
+# 3rd party modules
+from cachetools import TTLCache
+
+# Internal modules
+from app.config import (
+    POSITION_MIN_DISTANCE,
+    POSITION_MIN_INTERVAL,
+    POSITION_SAMPLING_CACHE_SIZE,
+    POSITION_SAMPLING_CACHE_TTL,
+)
+from app.models import Position
+from app.models.dto import CoordinateDTO
+from app.service import distance_util
+
+
+_lock = threading.Lock()
+_last_stored: TTLCache = TTLCache(
+    maxsize=POSITION_SAMPLING_CACHE_SIZE, ttl=POSITION_SAMPLING_CACHE_TTL
+)
+
+
+def try_mark_stored(
+    position: Position,
+    min_distance: int = POSITION_MIN_DISTANCE,
+    min_interval: float = POSITION_MIN_INTERVAL,
+) -> bool:
+    """Records a position as the last stored position of its member if it
+    differs enough from the previous one to be worth storing.
+
+    The check and the record happen under one lock, so concurrent requests
+    from the same member cannot both store close positions.
+
+    :param position: Position to check.
+    :param min_distance: Minimum distance in meters from the last stored position.
+    :param min_interval: Minimum time in seconds since the last stored position.
+    :return: True if the position should be stored.
+    """
+    with _lock:
+        if not _should_store(position, min_distance, min_interval):
+            return False
+        _mark_stored(position)
+        return True
+
+
+def mark_stored(position: Position) -> None:
+    """Records a position as the last stored position of its member.
+
+    :param position: Stored position.
+    """
+    with _lock:
+        _mark_stored(position)
+
+
+def sample(
+    positions: List[Position],
+    keep: Optional[int] = None,
+    min_distance: int = POSITION_MIN_DISTANCE,
+    min_interval: float = POSITION_MIN_INTERVAL,
+) -> List[Position]:
+    """Selects the positions worth storing out of an ordered list of positions,
+    sampling on the time the client recorded each position.
+
+    :param positions: Positions in the order they were recorded.
+    :param keep: Index of a position that must be stored regardless.
+    :param min_distance: Minimum distance in meters between stored positions.
+    :param min_interval: Minimum time in seconds between stored positions.
+    :return: Positions to store.
+    """
+    stored: List[Position] = []
+    with _lock:
+        for i, position in enumerate(positions):
+            if i == keep or _should_store(position, min_distance, min_interval):
+                _mark_stored(position)
+                stored.append(position)
+    return stored
+
+
+def _should_store(position: Position, min_distance: int, min_interval: float) -> bool:
+    if min_distance <= 0 and min_interval <= 0:
+        return True
+    last: Optional[Tuple[CoordinateDTO, datetime]] = _last_stored.get(
+        position.game_member_id
+    )
+    if not last:
+        return True
+    last_coordinate, last_created_at = last
+    if (position.created_at - last_created_at).total_seconds() < min_interval:
+        return False
+    distance = distance_util.calculate(last_coordinate, position.coordinate())
+    return distance >= min_distance
+
+
+def _mark_stored(position: Position) -> None:
+    _last_stored[position.game_member_id] = (position.coordinate(), position.created_at)
@@ -1,8 +1,9 @@
 # Standard library
-from typing import Optional, Tuple
+from typing import List, Optional
 from uuid import uuid4
 
 # 3rd party modules
+import numpy as np
 from crazerace.http.error import (
     PreconditionRequiredError,
     ForbiddenError,
@@ -12,79 +13,149 @@ from crazerace.http.error import (
 from crazerace.http.instrumentation import trace
 
 # Internal modules
-from app.config import MAX_ANSWER_DISTANCE
-from app.models import Game, GameMember, Position, Question, Placement
-from app.models.dto import PositionDTO, PositionResultDTO
-from app.repository import position_repo, question_repo, placement_repo
-from app.service import game_service, question_service, distance_util, game_state_util
+from app.config import POSITION_MIN_DISTANCE, POSITION_MIN_INTERVAL
+from app.config import POSITION_WRITE_BEHIND
+from app.models import Position, PositionContext, Placement
+from app.models.dto import (
+    ActiveQuestionDTO,
+    MemberStateDTO,
+    PositionDTO,
+    PositionResultDTO,
+    PositionBatchResultDTO,
+    QuestionCoordinateDTO,
+)
+from app.repository import position_repo, placement_repo
+from app.service import game_service, question_service, game_state_util
+from app.service import game_state_cache, geofence, position_buffer, position_sampler
 
 
 @trace("position_service")
 def add_position(
     game_id: str, user_id: str, position_dto: PositionDTO
 ) -> PositionResultDTO:
-    game, member = _assert_existing_game_and_member(
-        game_id, user_id, position_dto.game_member_id
-    )
-    position = _create_and_store_position(position_dto)
-    question = _position_is_answer_to(game, position)
-    if not question:
+    member_id = position_dto.game_member_id
+    position = _create_position(position_dto)
+    context = _find_position_context(game_id, user_id, member_id)
+    if context.is_cached and _is_answer_to(context, position):
+        context = _find_position_context(game_id, user_id, member_id, use_cache=False)
+    if not _is_answer_to(context, position):
+        if position_sampler.try_mark_stored(
+            position, POSITION_MIN_DISTANCE, POSITION_MIN_INTERVAL
+        ):
+            _store_position(position, write_behind=POSITION_WRITE_BEHIND)
         return PositionResultDTO.incorrect()
-    game_finished = _answer_question(game, member, question, position)
-    return _create_success_result(question, game_finished)
+    position_sampler.mark_stored(position)
+    return _answer_question(context, position)
 
 
 @trace("position_service")
-def _position_is_answer_to(game: Game, position: Position) -> Optional[Question]:
-    question = question_repo.find_members_active_question(
-        game.id, position.game_member_id
+def add_positions(
+    game_id: str, user_id: str, member_id: str, position_dtos: List[PositionDTO]
+) -> PositionBatchResultDTO:
+    positions = [_create_position(dto) for dto in position_dtos]
+    context = _find_position_context(game_id, user_id, member_id)
+    answer_index = _find_first_answer(context, positions)
+    if context.is_cached and answer_index is not None:
+        context = _find_position_context(game_id, user_id, member_id, use_cache=False)
+        answer_index = _find_first_answer(context, positions)
+    answer = positions[answer_index] if answer_index is not None else None
+    sampled = position_sampler.sample(
+        positions, answer_index, POSITION_MIN_DISTANCE, POSITION_MIN_INTERVAL
     )
-    origin = position.coordinate()
-    destination = question.coordinate()
-    return (
-        question
-        if question and distance_util.is_within(origin, destination, MAX_ANSWER_DISTANCE)
-        else None
+    stored_positions = [p for p in sampled if p is not answer]
+    if stored_positions:
+        position_repo.save_all(stored_positions)
+    if not answer:
+        return PositionBatchResultDTO(result=PositionResultDTO.incorrect())
+    result = _answer_question(context, answer)
+    return PositionBatchResultDTO(
+        result=result, answer_index=answer_index if result.is_answer else None
     )
 
 
 @trace("position_service")
 def _answer_question(
-    game: Game, member: GameMember, question: Question, position: Position
-) -> bool:
-    question_repo.set_member_question_as_answered(question.id, position)
-    if _member_is_done(game, member):
-        placement_repo.save(Placement(game_id=game.id, member_id=member.id))
-        return game_service.check_if_game_ended(game)
-    return False
+    context: PositionContext, position: Position
+) -> PositionResultDTO:
+    member: MemberStateDTO = context.member  # type: ignore
+    active_question: ActiveQuestionDTO = member.active_question  # type: ignore
+    answered = position_repo.save_answer(position, active_question.member_question_id)
+    game_state_cache.invalidate(context.game_id)
+    if not answered:
+        # A concurrent request answered the question after the context was read.
+        return PositionResultDTO.incorrect()
+    geofence.remove(member.id)
+    game_finished = False
+    if member.answered_count + 1 == context.question_count:
+        placement_repo.save(Placement(game_id=context.game_id, member_id=member.id))
+        game = game_state_util.assert_game_exists(context.game_id)
+        game_finished = game_service.check_if_game_ended(game)
+    return _create_success_result(active_question.question.id, game_finished)
+
+
+def _active_question(context: PositionContext) -> Optional[QuestionCoordinateDTO]:
+    if not context.member or not context.member.active_question:
+        return None
+    return context.member.active_question.question
+
+
+def _is_answer_to(context: PositionContext, position: Position) -> bool:
+    question = _active_question(context)
+    if not question:
+        return False
+    fence = geofence.find(position.game_member_id, question)
+    return fence.contains(position.coordinate())
+
+
+def _find_first_answer(
+    context: PositionContext, positions: List[Position]
+) -> Optional[int]:
+    question = _active_question(context)
+    if not question or not positions:
+        return None
+    fence = geofence.find(positions[0].game_member_id, question)
+    latitudes = np.array([p.latitude for p in positions], dtype=np.float64)
+    longitudes = np.array([p.longitude for p in positions], dtype=np.float64)
+    answers = fence.contains_many(latitudes, longitudes)
+    return int(np.argmax(answers)) if answers.any() else None
+
+
+def _store_position(position: Position, write_behind: bool) -> None:
+    if write_behind:
+        position_buffer.add(position)
+    else:
+        position_repo.save(position)
 
 
-def _create_and_store_position(dto: PositionDTO) -> Position:
-    position = Position(
+def _create_position(dto: PositionDTO) -> Position:
+    return Position(
         id=dto.id,
         game_member_id=dto.game_member_id,
         latitude=dto.latitude,
         longitude=dto.longitude,
         created_at=dto.created_at,
     )
-    position_repo.save(position)
-    return position
 
 
-def _create_success_result(question: Question, finished: bool) -> PositionResultDTO:
+def _create_success_result(question_id: str, finished: bool) -> PositionResultDTO:
     return PositionResultDTO(
-        is_answer=True, game_finished=finished, question=question_service.to_dto(question)
+        is_answer=True,
+        game_finished=finished,
+        question=question_service.get_question(question_id),
     )
 
 
-def _member_is_done(game: Game, member: GameMember) -> bool:
-    answered_questions = [q for q in member.questions if q.position_id is not None]
-    return len(answered_questions) == len(game.questions)
-
-
-def _assert_existing_game_and_member(
-    game_id: str, user_id: str, member_id: str
-) -> Tuple[Game, GameMember]:
-    game = game_state_util.assert_game_exists(game_id)
-    member = game_state_util.assert_valid_game_member(game_id, member_id, user_id)
-    return game, member
+def _find_position_context(
+    game_id: str, user_id: str, member_id: str, use_cache: bool = True
+) -> PositionContext:
+    context = (
+        game_state_cache.find_position_context(game_id, member_id) if use_cache else None
+    )
+    if not context:
+        context = position_repo.find_position_context(game_id, member_id)
+    if not context:
+        raise PreconditionRequiredError(f"Game with id={game_id} does not exit")
+    game_state_util.assert_loaded_game_member(
+        context.member, game_id, member_id, user_id
+    )
+    return context
@@ -0,0 +1,296 @@
+# Standard library
+import logging
+import math
+import threading
+from collections import defaultdict
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+# 3rd party modules
+import numpy as np
+from crazerace.http.instrumentation import trace
+
+# Internal modules
+from app.config import DEFAULT_MIN_DISTANCE, DEFAULT_MAX_DISTANCE
+from app.models import Question
+from app.models.dto import CoordinateDTO, QuestionCoordinateDTO
+from app.repository import question_repo
+from app.service import distance_util, neighbour_graph, question_snapshot
+from app.service.question_snapshot import SnapshotHeader
+
+
+_log = logging.getLogger(__name__)
+
+# Roughly 1.1 km along a meridian, small enough to keep annulus lookups local.
+_CELL_SIZE_DEGREES: float = 0.01
+_INITIAL_CAPACITY: int = 1024
+
+
+class QuestionIndex:
+    """Grid index over question coordinates.
+
+    Questions are bucketed into cells of a fixed size in degrees, so that a
+    distance query only has to calculate distances to the questions in the cells
+    overlapping the bounding box of the query.
+    Each question is identified by its row, a dense integer assigned in insertion order.
+
+    The index also keeps a neighbour graph, linking every pair of questions that
+    lie between min_link and max_link meters from each other, so that chained
+    hops between questions do not require any distance calculations. The graph
+    is held as compressed sparse row arrays built in bulk, which may be memory
+    mapped, and the links of rows added one by one are kept beside them.
+
+    Rows are only stable within one generation of the catalog index, anything
+    keyed by row must be discarded when the generation changes.
+    """
+
+    def __init__(
+        self,
+        cell_size: float = _CELL_SIZE_DEGREES,
+        min_link: int = DEFAULT_MIN_DISTANCE,
+        max_link: int = DEFAULT_MAX_DISTANCE,
+        generation: int = 0,
+    ) -> None:
+        self.generation = generation
+        self._cell_size = cell_size
+        self._min_link = min_link
+        self._max_link = max_link
+        self._indptr = np.zeros(1, dtype=np.int32)
+        self._indices = np.zeros(0, dtype=np.int32)
+        self._added_links: Dict[int, List[int]] = defaultdict(list)
+        self._ids: List[str] = []
+        self._rows: Dict[str, int] = {}
+        self._latitudes = np.empty(_INITIAL_CAPACITY, dtype=np.float64)
+        self._longitudes = np.empty(_INITIAL_CAPACITY, dtype=np.float64)
+        self._cells: Dict[Tuple[int, int], List[int]] = defaultdict(list)
+
+    def __len__(self) -> int:
+        return len(self._ids)
+
+    def add(self, question_id: str, coordinate: CoordinateDTO) -> int:
+        """Adds a question to the index.
+
+        :param question_id: Id of the question.
+        :param coordinate: CoordinateDTO of the question.
+        :return: Row assigned to the question.
+        """
+        row = len(self._ids)
+        if row == len(self._latitudes) or not self._latitudes.flags.writeable:
+            self._latitudes = _grow(self._latitudes, row)
+            self._longitudes = _grow(self._longitudes, row)
+        self._latitudes[row] = coordinate.latitude
+        self._longitudes[row] = coordinate.longitude
+        return self._index_row(question_id)
+
+    def extend_to(
+        self,
+        new_ids: List[str],
+        latitudes: np.ndarray,
+        longitudes: np.ndarray,
+        graph: Optional[Tuple[np.ndarray, np.ndarray]] = None,
+    ) -> None:
+        """Switches to new backing arrays and indexes the rows not indexed yet.
+
+        The arrays may be read only, such as memory mapped snapshot columns,
+        but must start with the rows already in the index.
+
+        :param new_ids: Ids of the questions in the rows not indexed yet.
+        :param latitudes: Array of question latitudes, one per row.
+        :param longitudes: Array of question longitudes, one per row.
+        :param graph: Neighbour graph over the first rows of the arrays, as
+        built by neighbour_graph.build, used instead of linking those rows one
+        by one. Only used while the index is empty.
+        """
+        self._latitudes = latitudes
+        self._longitudes = longitudes
+        if graph is not None and not self._ids:
+            self._indptr, self._indices = graph
+            graph_rows = len(self._indptr) - 1
+            for question_id in new_ids[:graph_rows]:
+                self._add_to_cell(question_id)
+            new_ids = new_ids[graph_rows:]
+        for question_id in new_ids:
+            self._index_row(question_id)
+
+    def _index_row(self, question_id: str) -> int:
+        row = len(self._ids)
+        neighbours = self.find_within(
+            self.coordinate(row), self._min_link, self._max_link
+        )
+        self._added_links[row].extend(neighbours)
+        for neighbour in neighbours:
+            self._added_links[neighbour].append(row)
+        return self._add_to_cell(question_id)
+
+    def _add_to_cell(self, question_id: str) -> int:
+        row = len(self._ids)
+        self._ids.append(question_id)
+        self._rows[question_id] = row
+        cell = self._cell_of(float(self._latitudes[row]), float(self._longitudes[row]))
+        self._cells[cell].append(row)
+        return row
+
+    def find_within(
+        self, origin: CoordinateDTO, min_dist: int, max_dist: int
+    ) -> List[int]:
+        """Finds the questions in an annulus around a position.
+
+        :param origin: CoordinateDTO at the center of the annulus.
+        :param min_dist: Minimum distance in meters.
+        :param max_dist: Maximum distance in meters.
+        :return: Sorted list of rows of the matching questions.
+        """
+        candidates = self._rows_near(origin, max_dist)
+        if not candidates:
+            return []
+        latitudes, longitudes = self.coordinates(candidates)
+        matches = distance_util.is_within_many(
+            origin, latitudes, longitudes, max_dist, min_dist
+        )
+        return [row for row, is_match in zip(candidates, matches) if is_match]
+
+    def neighbours(self, row: int) -> np.ndarray:
+        """Lists the questions between min_link and max_link meters from a question.
+
+        :param row: Row of the question.
+        :return: Array of the rows of the neighbouring questions, in ascending order.
+        """
+        linked = (
+            self._indices[self._indptr[row] : self._indptr[row + 1]]
+            if row < len(self._indptr) - 1
+            else self._indices[:0]
+        )
+        added = self._added_links.get(row)
+        return np.concatenate([linked, added]) if added else linked
+
+    def coordinates(self, rows: List[int]) -> Tuple[np.ndarray, np.ndarray]:
+        return self._latitudes[rows], self._longitudes[rows]
+
+    def coordinate(self, row: int) -> CoordinateDTO:
+        return CoordinateDTO(
+            latitude=float(self._latitudes[row]), longitude=float(self._longitudes[row])
+        )
+
+    def question_id(self, row: int) -> str:
+        return self._ids[row]
+
+    def rows_of(self, question_ids: Iterable[str]) -> Set[int]:
+        return {self._rows[q_id] for q_id in question_ids if q_id in self._rows}
+
+    def _rows_near(self, origin: CoordinateDTO, distance: int) -> List[int]:
+        box = distance_util.bounding_box(origin, distance)
+        min_lat_cell, min_lon_cell = self._cell_of(box.min_latitude, box.min_longitude)
+        max_lat_cell, max_lon_cell = self._cell_of(box.max_latitude, box.max_longitude)
+        rows: List[int] = []
+        for lat_cell in range(min_lat_cell, max_lat_cell + 1):
+            for lon_cell in range(min_lon_cell, max_lon_cell + 1):
+                rows.extend(self._cells.get((lat_cell, lon_cell), []))
+        return sorted(rows)
+
+    def _cell_of(self, latitude: float, longitude: float) -> Tuple[int, int]:
+        return (
+            math.floor(latitude / self._cell_size),
+            math.floor(longitude / self._cell_size),
+        )
+
+
+_lock = threading.Lock()
+_index: Optional[QuestionIndex] = None
+_header: Optional[SnapshotHeader] = None
+
+
+@trace("question_index")
+def get_index() -> QuestionIndex:
+    """Returns the index over the question catalog.
+
+    The index is backed by the shared question snapshot. A new snapshot is
+    written if the catalog in the database has changed since the current one,
+    and the index follows the snapshot incrementally when only questions have
+    been appended to it.
+
+    :return: QuestionIndex.
+    """
+    version = question_repo.find_catalog_version()
+    with _lock:
+        header = question_snapshot.find_current()
+        if not header or header.catalog_version != version:
+            header = question_snapshot.write(version, question_repo.find_all_coordinates)
+        _sync(header)
+        return _index  # type: ignore
+
+
+def current_index() -> Optional[QuestionIndex]:
+    """Returns the index over the question catalog without checking if it is current.
+
+    :return: QuestionIndex or None if no index has been built.
+    """
+    return _index
+
+
+@trace("question_index")
+def add_question(question: Question) -> None:
+    """Appends a newly stored question to the snapshot and the index, if built.
+
+    :param question: Stored question.
+    """
+    with _lock:
+        if _index is None or _header is None:
+            return
+        count, latest = _header.catalog_version
+        version = (
+            count + 1,
+            max(latest, question.created_at) if latest else question.created_at,
+        )
+        coordinate = QuestionCoordinateDTO(
+            id=question.id, latitude=question.latitude, longitude=question.longitude
+        )
+        header = question_snapshot.append(_header, coordinate, version)
+        if header:
+            _sync(header)
+
+
+def _sync(header: SnapshotHeader) -> None:
+    global _index, _header
+    if header == _header:
+        return
+    if not _index or _index.generation != header.generation or len(_index) > header.count:
+        _index = QuestionIndex(generation=header.generation)
+    snapshot = question_snapshot.load(header)
+    if len(_index) < header.base_count:
+        new_ids = [question_id.decode() for question_id in snapshot.ids[len(_index) :]]
+        _index.extend_to(
+            new_ids, snapshot.latitudes, snapshot.longitudes, snapshot.graph
+        )
+    for question in snapshot.appended[len(_index) - header.base_count :]:
+        _index.add(question.id, question.coordinate())
+    _header = header
+    _log.info(f"Question index synced to snapshot {header.generation}-{header.count}")
+
+
+def build_index(
+    questions: Iterable[QuestionCoordinateDTO], generation: int = 0
+) -> QuestionIndex:
+    """Builds a standalone index over a set of questions.
+
+    :param questions: Questions to index.
+    :param generation: Generation of the index.
+    :return: QuestionIndex.
+    """
+    question_list = list(questions)
+    latitudes = np.array([q.latitude for q in question_list], dtype=np.float64)
+    longitudes = np.array([q.longitude for q in question_list], dtype=np.float64)
+    index = QuestionIndex(generation=generation)
+    index.extend_to(
+        [q.id for q in question_list],
+        latitudes,
+        longitudes,
+        graph=neighbour_graph.build(
+            latitudes, longitudes, DEFAULT_MIN_DISTANCE, DEFAULT_MAX_DISTANCE
+        ),
+    )
+    return index
+
+
+def _grow(values: np.ndarray, size: int) -> np.ndarray:
+    grown = np.empty(max(size * 2, _INITIAL_CAPACITY), dtype=values.dtype)
+    grown[:size] = values[:size]
+    return grown
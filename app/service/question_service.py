@@ -1,17 +1,25 @@
 # Standard library
-import random
-from typing import List
+from typing import List, Tuple
 
 # 3rd party modules
+import numpy as np
 from crazerace.http.error import NotFoundError, InternalServerError
 from crazerace.http.instrumentation import trace
 
 # Internal modules
-from app.config import DEFAULT_NO_QUESTIONS, DEFAULT_MIN_DISTANCE, DEFAULT_MAX_DISTANCE
+from app.config import (
+    DEFAULT_NO_QUESTIONS,
+    DEFAULT_MIN_DISTANCE,
+    DEFAULT_MAX_DISTANCE,
+    QUESTION_INDEX_ENABLED,
+)
 from app.models import Question, Game, GameMember, GameMemberQuestion
-from app.models.dto import QuestionDTO, CoordinateDTO
+from app.models.dto import QuestionDTO, CoordinateDTO, QuestionCoordinateDTO
 from app.repository import question_repo
-from app.service import util, distance_util, game_state_util
+from app.service import util, distance_util, game_state_util, question_index
+from app.service import game_state_cache, geofence, route_planner, seen_questions
+from app.service.question_index import QuestionIndex
+from app.service.seen_questions import QuestionBitset
 
 
 @trace("question_service")
@@ -27,6 +35,7 @@ def add_question(new_q: QuestionDTO) -> None:
         created_at=new_q.created_at,
     )
     question_repo.save(question)
+    question_index.add_question(question)
 
 
 @trace("question_service")
@@ -38,10 +47,29 @@ def get_question(question_id: str) -> QuestionDTO:
 
 
 @trace("question_service")
-def find_questions_for_game(game: Game, coordinate: CoordinateDTO) -> List[Question]:
-    prev_ids = question_repo.find_previous_question_ids(game)
-    available_questions = question_repo.find_all(except_ids=prev_ids)
-    return _select_questions(available_questions, coordinate, DEFAULT_NO_QUESTIONS)
+def find_questions_for_game(game: Game, coordinate: CoordinateDTO) -> List[str]:
+    """Selects the questions of a game starting at a coordinate, excluding the
+    questions that any member has played before.
+
+    By default the route is planned over the catalog index, which is loaded
+    from the whole question table once per catalog version and shared by all
+    workers, so starting a game does not query questions at all. With
+    QUESTION_INDEX_ENABLED=0 every start instead queries the questions in the
+    bounding box the route can reach and indexes only those, which uses less
+    memory but pays for the query and the neighbour graph on every start.
+
+    :param game: Game to select questions for.
+    :param coordinate: CoordinateDTO of the start.
+    :return: Ids of the selected questions in route order.
+    """
+    if not QUESTION_INDEX_ENABLED:
+        index = _index_questions_near(coordinate, game.id)
+        return _select_questions(
+            index, QuestionBitset(), coordinate, DEFAULT_NO_QUESTIONS
+        )
+    index = question_index.get_index()
+    seen = seen_questions.find_seen([m.user_id for m in game.members], index)
+    return _select_questions(index, seen, coordinate, DEFAULT_NO_QUESTIONS)
 
 
 @trace("question_service")
@@ -49,69 +77,54 @@ def get_members_next_question(
     game_id: str, member_id: str, user_id: str, current_position: CoordinateDTO
 ) -> QuestionDTO:
     game = game_state_util.assert_active_game_exists(game_id)
-    game_state_util.assert_valid_game_member(game_id, member_id, user_id)
+    # Only the membership is read from the cache, since the active question may
+    # have been answered through another worker, which cannot invalidate it.
+    state = game_state_cache.find(game_id)
+    member = state.members.get(member_id) if state else None
+    if member:
+        game_state_util.assert_loaded_game_member(member, game_id, member_id, user_id)
+    else:
+        game_state_util.assert_valid_game_member(game_id, member_id, user_id)
     active_question = question_repo.find_members_active_question(game_id, member_id)
     if active_question:
         return to_dto(active_question)
-    questions = question_repo.find_members_possible_questions(game_id, member_id)
-    question = _select_closest_question(questions, current_position)
-    _create_and_save_game_member_question(game, member_id, question)
-    return to_dto(question)
+    candidates = question_repo.find_members_possible_question_coordinates(
+        game_id, member_id
+    )
+    closest = _select_closest_question(candidates, current_position)
+    _create_and_save_game_member_question(game, member_id, closest.id)
+    game_state_cache.invalidate(game_id)
+    geofence.create(member_id, closest)
+    return get_question(closest.id)
 
 
-def _select_questions(
-    questions: List[Question], origin: CoordinateDTO, no_questions: int
-) -> List[Question]:
-    _assert_enough_questions(questions, no_questions)
-    selected: List[Question] = []
-    for _ in range(no_questions):
-        question = _select_question(questions, origin, selected)
-        origin = question.coordinate()
-        selected += [question]
-    return selected
-
-
-def _select_question(
-    questions: List[Question], origin: CoordinateDTO, previous: List[Question]
-) -> Question:
-    matching_questions = _select_questions_within(
-        questions, origin, DEFAULT_MIN_DISTANCE, DEFAULT_MAX_DISTANCE, previous
-    )
-    if not matching_questions:
-        raise InternalServerError("No questions could be selected")
-    return random.choice(matching_questions)
+def _index_questions_near(coordinate: CoordinateDTO, game_id: str) -> QuestionIndex:
+    reach = DEFAULT_MAX_DISTANCE * DEFAULT_NO_QUESTIONS
+    bounds = distance_util.bounding_box(coordinate, reach)
+    candidates = question_repo.find_coordinates_within(bounds, game_id)
+    return question_index.build_index(candidates)
 
 
-def _select_questions_within(
-    questions: List[Question],
+def _select_questions(
+    index: QuestionIndex,
+    excluded: QuestionBitset,
     origin: CoordinateDTO,
-    min_dist: int,
-    max_dist: int,
-    previous: List[Question],
-) -> List[Question]:
-    matches = [
-        q
-        for q in questions
-        if distance_util.is_within(origin, q.coordinate(), max_dist, min_dist)
-    ]
-    return [m for m in matches if _previous_are_far_enough(m, previous, min_dist // 2)]
-
-
-def _previous_are_far_enough(
-    question: Question, previous: List[Question], min_dist: int
-) -> bool:
-    for prev in previous:
-        if not distance_util.is_at_least(
-            question.coordinate(), prev.coordinate(), min_dist
-        ):
-            return False
-    return True
+    no_questions: int,
+) -> List[str]:
+    _assert_enough_questions(len(index) - len(excluded), no_questions)
+    first_hop = index.find_within(origin, DEFAULT_MIN_DISTANCE, DEFAULT_MAX_DISTANCE)
+    route = route_planner.plan_route(
+        index, first_hop, excluded, no_questions, DEFAULT_MIN_DISTANCE // 2
+    )
+    if not route:
+        raise InternalServerError("No questions could be selected")
+    return [index.question_id(row) for row in route]
 
 
 def _select_closest_question(
-    questions: List[Question], coordinate: CoordinateDTO
-) -> Question:
-    _assert_enough_questions(questions, 1)
+    questions: List[QuestionCoordinateDTO], coordinate: CoordinateDTO
+) -> QuestionCoordinateDTO:
+    _assert_enough_questions(len(questions), 1)
     if len(questions) == 1:
         return questions[0]
     candidates = _filter_to_close_questions(questions, coordinate)
@@ -119,41 +132,44 @@ def _select_closest_question(
 
 
 def _filter_to_close_questions(
-    questions: List[Question], coordinate: CoordinateDTO
-) -> List[Question]:
+    questions: List[QuestionCoordinateDTO], coordinate: CoordinateDTO
+) -> List[QuestionCoordinateDTO]:
     min_dist = DEFAULT_MIN_DISTANCE // 4
-    return [
-        q
-        for q in questions
-        if distance_util.calculate(q.coordinate(), coordinate) > min_dist
-    ]
+    latitudes, longitudes = _coordinate_arrays(questions)
+    far_enough = distance_util.is_at_least_many(
+        coordinate, latitudes, longitudes, min_dist
+    )
+    return [q for q, is_far in zip(questions, far_enough) if is_far]
 
 
 def _find_closest_question(
-    questions: List[Question], coordinate: CoordinateDTO
-) -> Question:
-    _assert_enough_questions(questions, 1)
-    closest = questions[0]
-    closest_distance = distance_util.calculate(closest.coordinate(), coordinate)
-    for question in questions:
-        distance = distance_util.calculate(question.coordinate(), coordinate)
-        if distance < closest_distance:
-            closest = question
-            closest_distance = distance
-    return closest
+    questions: List[QuestionCoordinateDTO], coordinate: CoordinateDTO
+) -> QuestionCoordinateDTO:
+    _assert_enough_questions(len(questions), 1)
+    latitudes, longitudes = _coordinate_arrays(questions)
+    distances = distance_util.calculate_many(coordinate, latitudes, longitudes)
+    return questions[int(np.argmin(distances))]
+
+
+def _coordinate_arrays(
+    questions: List[QuestionCoordinateDTO]
+) -> Tuple[np.ndarray, np.ndarray]:
+    latitudes = np.array([q.latitude for q in questions], dtype=np.float64)
+    longitudes = np.array([q.longitude for q in questions], dtype=np.float64)
+    return latitudes, longitudes
 
 
 def _create_and_save_game_member_question(
-    game: Game, member_id: str, question: Question
+    game: Game, member_id: str, question_id: str
 ) -> None:
-    game_question_id = [q.id for q in game.questions if q.question_id == question.id][0]
+    game_question_id = [q.id for q in game.questions if q.question_id == question_id][0]
     question_repo.save_game_member_question(
         GameMemberQuestion(member_id=member_id, game_question_id=game_question_id)
     )
 
 
-def _assert_enough_questions(questions: List[Question], expected: int) -> None:
-    if len(questions) < expected:
+def _assert_enough_questions(available: int, expected: int) -> None:
+    if available < expected:
         raise InternalServerError("Not enough questions")
 
 
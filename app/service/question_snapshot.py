@@ -0,0 +1,310 @@
+# Standard library
+import fcntl
+import json
+import logging
+import os
+import shutil
+from contextlib import contextmanager
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+# 3rd party modules
+import numpy as np
+from crazerace.http.instrumentation import trace
+
+# Internal modules
+from app.config import DATETIME_FORMAT, QUESTION_SNAPSHOT_DIR
+from app.config import DEFAULT_MIN_DISTANCE, DEFAULT_MAX_DISTANCE
+from app.config import QUESTION_SNAPSHOT_MAX_DELTA
+from app.models.dto import QuestionCoordinateDTO
+from app.service import neighbour_graph
+
+
+_log = logging.getLogger(__name__)
+
+CatalogVersion = Tuple[int, Optional[datetime]]
+
+_CURRENT_FILE: str = "CURRENT"
+_LOCK_FILE: str = "LOCK"
+_DELTA_PREFIX: str = "delta-"
+_ID_LENGTH: int = 50
+_MIN_DELTA_ROWS: int = 100
+_DELTA_DTYPE = np.dtype(
+    [("id", f"S{_ID_LENGTH}"), ("latitude", np.float64), ("longitude", np.float64)]
+)
+
+
+@dataclass(frozen=True)
+class SnapshotHeader:
+    generation: int
+    count: int
+    base_count: int
+    catalog_version: CatalogVersion
+
+    @property
+    def directory(self) -> str:
+        return os.path.join(
+            QUESTION_SNAPSHOT_DIR, f"{self.generation}-{self.base_count}"
+        )
+
+    @property
+    def delta_path(self) -> str:
+        return os.path.join(self.directory, f"{_DELTA_PREFIX}{self.count}.npy")
+
+
+@dataclass(frozen=True)
+class Snapshot:
+    header: SnapshotHeader
+    ids: np.ndarray
+    latitudes: np.ndarray
+    longitudes: np.ndarray
+    graph: Optional[Tuple[np.ndarray, np.ndarray]]
+    appended: List[QuestionCoordinateDTO]
+
+
+@trace("question_snapshot")
+def find_current() -> Optional[SnapshotHeader]:
+    """Reads the header of the current snapshot.
+
+    :return: SnapshotHeader or None if no snapshot has been written.
+    """
+    try:
+        with open(os.path.join(QUESTION_SNAPSHOT_DIR, _CURRENT_FILE)) as f:
+            return _parse_header(json.load(f))
+    except FileNotFoundError:
+        return None
+
+
+@trace("question_snapshot")
+def load(header: SnapshotHeader) -> Snapshot:
+    """Memory maps the base columns and the neighbour graph of a snapshot read
+    only and reads the questions appended since the base was written.
+
+    Snapshots written before graphs were stored have none.
+
+    :param header: SnapshotHeader of the snapshot to load.
+    :return: Snapshot.
+    """
+    columns = [
+        _load_column(header.directory, name)
+        for name in ("ids", "latitudes", "longitudes")
+    ]
+    try:
+        graph: Optional[Tuple[np.ndarray, np.ndarray]] = (
+            _load_column(header.directory, "indptr"),
+            _load_column(header.directory, "indices"),
+        )
+    except FileNotFoundError:
+        graph = None
+    appended = [
+        QuestionCoordinateDTO(
+            id=row["id"].decode(),
+            latitude=float(row["latitude"]),
+            longitude=float(row["longitude"]),
+        )
+        for row in _load_delta(header)
+    ]
+    return Snapshot(header, *columns, graph=graph, appended=appended)
+
+
+@trace("question_snapshot")
+def write(
+    catalog_version: CatalogVersion,
+    find_questions: Callable[[], List[QuestionCoordinateDTO]],
+) -> SnapshotHeader:
+    """Writes a snapshot of the full catalog as a new generation, unless another
+    process already has written one for the same catalog version.
+
+    :param catalog_version: Version of the catalog in the database.
+    :param find_questions: Function returning all questions in the catalog.
+    :return: SnapshotHeader of the current snapshot.
+    """
+    with _exclusive_lock():
+        current = find_current()
+        if current and current.catalog_version == catalog_version:
+            return current
+        questions = find_questions()
+        header = SnapshotHeader(
+            generation=current.generation + 1 if current else 1,
+            count=len(questions),
+            base_count=len(questions),
+            catalog_version=catalog_version,
+        )
+        _write_base(
+            header,
+            ids=np.array([q.id.encode() for q in questions], dtype=f"S{_ID_LENGTH}"),
+            latitudes=np.array([q.latitude for q in questions], dtype=np.float64),
+            longitudes=np.array([q.longitude for q in questions], dtype=np.float64),
+        )
+        _set_current(header, current)
+        _log.info(f"Wrote question snapshot {header.generation}-{header.count}")
+        return header
+
+
+@trace("question_snapshot")
+def append(
+    expected: SnapshotHeader,
+    question: QuestionCoordinateDTO,
+    catalog_version: CatalogVersion,
+) -> Optional[SnapshotHeader]:
+    """Appends a question to the current snapshot, keeping the generation and
+    the rows of the existing questions.
+
+    The question is written to a delta segment next to the base columns, so
+    only the questions appended since the base was written are copied. Once
+    the delta grows beyond QUESTION_SNAPSHOT_MAX_DELTA of the base, the two
+    are compacted into a new base with a rebuilt neighbour graph.
+
+    :param expected: SnapshotHeader the caller expects to be current.
+    :param question: Question to append.
+    :param catalog_version: Version of the catalog including the new question.
+    :return: SnapshotHeader of the new snapshot or None if the current snapshot
+    was not the expected one.
+    """
+    with _exclusive_lock():
+        current = find_current()
+        if current != expected:
+            return None
+        new_row = np.array(
+            [(question.id.encode(), question.latitude, question.longitude)],
+            dtype=_DELTA_DTYPE,
+        )
+        delta = np.concatenate([_load_delta(expected), new_row])
+        header = SnapshotHeader(
+            generation=expected.generation,
+            count=expected.count + 1,
+            base_count=expected.base_count,
+            catalog_version=catalog_version,
+        )
+        if len(delta) <= max(
+            _MIN_DELTA_ROWS, QUESTION_SNAPSHOT_MAX_DELTA * expected.base_count
+        ):
+            _write_delta(header, delta)
+        else:
+            header = _compact(expected, delta, header)
+        _set_current(header, current)
+        return header
+
+
+def _compact(
+    base: SnapshotHeader, delta: np.ndarray, header: SnapshotHeader
+) -> SnapshotHeader:
+    snapshot = load(base)
+    compacted = SnapshotHeader(
+        generation=header.generation,
+        count=header.count,
+        base_count=header.count,
+        catalog_version=header.catalog_version,
+    )
+    _write_base(
+        compacted,
+        ids=np.concatenate([snapshot.ids, delta["id"]]),
+        latitudes=np.concatenate([snapshot.latitudes, delta["latitude"]]),
+        longitudes=np.concatenate([snapshot.longitudes, delta["longitude"]]),
+    )
+    _log.info(f"Compacted question snapshot {header.generation}-{header.count}")
+    return compacted
+
+
+def _load_column(directory: str, name: str) -> np.ndarray:
+    path = os.path.join(directory, f"{name}.npy")
+    try:
+        return np.load(path, mmap_mode="r")
+    except ValueError:
+        # Empty arrays cannot be memory mapped.
+        return np.load(path)
+
+
+def _load_delta(header: SnapshotHeader) -> np.ndarray:
+    if header.count == header.base_count:
+        return np.zeros(0, dtype=_DELTA_DTYPE)
+    return np.load(header.delta_path)
+
+
+def _write_base(
+    header: SnapshotHeader,
+    ids: np.ndarray,
+    latitudes: np.ndarray,
+    longitudes: np.ndarray,
+) -> None:
+    indptr, indices = neighbour_graph.build(
+        latitudes, longitudes, DEFAULT_MIN_DISTANCE, DEFAULT_MAX_DISTANCE
+    )
+    columns = {
+        "ids": ids,
+        "latitudes": latitudes,
+        "longitudes": longitudes,
+        "indptr": indptr,
+        "indices": indices,
+    }
+    tmp_directory = f"{header.directory}.tmp"
+    shutil.rmtree(tmp_directory, ignore_errors=True)
+    os.makedirs(tmp_directory)
+    for name, values in columns.items():
+        np.save(os.path.join(tmp_directory, f"{name}.npy"), values)
+    shutil.rmtree(header.directory, ignore_errors=True)
+    os.rename(tmp_directory, header.directory)
+
+
+def _write_delta(header: SnapshotHeader, delta: np.ndarray) -> None:
+    tmp_path = f"{header.delta_path}.tmp"
+    with open(tmp_path, "wb") as f:
+        np.save(f, delta)
+    os.replace(tmp_path, header.delta_path)
+
+
+def _set_current(header: SnapshotHeader, previous: Optional[SnapshotHeader]) -> None:
+    tmp_path = os.path.join(QUESTION_SNAPSHOT_DIR, f"{_CURRENT_FILE}.tmp")
+    with open(tmp_path, "w") as f:
+        json.dump(_serialize_header(header), f)
+    os.replace(tmp_path, os.path.join(QUESTION_SNAPSHOT_DIR, _CURRENT_FILE))
+    # The previous snapshot is kept for readers that have just read its header,
+    # already mapped files stay readable after being removed.
+    keep = {header.directory, header.delta_path}
+    if previous:
+        keep.update({previous.directory, previous.delta_path})
+    for name in os.listdir(QUESTION_SNAPSHOT_DIR):
+        path = os.path.join(QUESTION_SNAPSHOT_DIR, name)
+        if os.path.isdir(path) and path not in keep:
+            shutil.rmtree(path, ignore_errors=True)
+    for name in os.listdir(header.directory):
+        path = os.path.join(header.directory, name)
+        if name.startswith(_DELTA_PREFIX) and path not in keep:
+            os.remove(path)
+
+
+@contextmanager
+def _exclusive_lock() -> Iterator[None]:
+    os.makedirs(QUESTION_SNAPSHOT_DIR, exist_ok=True)
+    with open(os.path.join(QUESTION_SNAPSHOT_DIR, _LOCK_FILE), "w") as lock_file:
+        fcntl.flock(lock_file, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+
+def _serialize_header(header: SnapshotHeader) -> Dict[str, Any]:
+    count, latest = header.catalog_version
+    return {
+        "generation": header.generation,
+        "count": header.count,
+        "baseCount": header.base_count,
+        "catalogCount": count,
+        "catalogLatest": latest.strftime(DATETIME_FORMAT) if latest else None,
+    }
+
+
+def _parse_header(raw: Dict[str, Any]) -> SnapshotHeader:
+    latest = raw["catalogLatest"]
+    return SnapshotHeader(
+        generation=raw["generation"],
+        count=raw["count"],
+        # Snapshots written before delta segments hold every question in the base.
+        base_count=raw.get("baseCount", raw["count"]),
+        catalog_version=(
+            raw["catalogCount"],
+            datetime.strptime(latest, DATETIME_FORMAT) if latest else None,
+        ),
+    )
@@ -0,0 +1,108 @@
+# Standard library
+import logging
+import random
+from typing import List, Optional, Set, Tuple
+
+# 3rd party modules
+import numpy as np
+from crazerace.http.instrumentation import trace
+
+# Internal modules
+from app.config import ROUTE_SEARCH_BUDGET
+from app.service import distance_util
+from app.service.question_index import QuestionIndex
+from app.service.seen_questions import QuestionBitset
+
+
+_log = logging.getLogger(__name__)
+
+
+@trace("route_planner")
+def plan_route(
+    index: QuestionIndex,
+    first_hop: List[int],
+    excluded: QuestionBitset,
+    length: int,
+    min_spacing: int,
+    budget: int = ROUTE_SEARCH_BUDGET,
+) -> Optional[List[int]]:
+    """Plans a route of questions by a randomized depth first search.
+
+    The first question is picked among first_hop and every following question
+    among the neighbours of the previous one. Every question in the route must be
+    more than min_spacing meters from all earlier questions in the route.
+
+    :param index: QuestionIndex to plan the route over.
+    :param first_hop: Rows of the candidates for the first question.
+    :param excluded: Rows of questions that must not be part of the route.
+    :param length: Number of questions in the route.
+    :param min_spacing: Minimum distance in meters between questions in the route.
+    :param budget: Maximum number of partial routes to explore.
+    :return: Rows of the questions in the route or None if no route was found.
+    """
+    search = _RouteSearch(index, excluded, min_spacing, budget)
+    route, _ = search.extend([], first_hop, length)
+    if route is None and search.exhausted:
+        _log.warning(f"Route search budget of {budget} partial routes exhausted")
+    return route
+
+
+class _RouteSearch:
+    """Search state for plan_route.
+
+    Dead ends are remembered as (row, remaining) pairs, but only when the failed
+    subtree was never pruned by the spacing rule. Such failures do not depend on
+    the route leading up to the row, so the subtree never has to be searched again.
+    """
+
+    def __init__(
+        self,
+        index: QuestionIndex,
+        excluded: QuestionBitset,
+        min_spacing: int,
+        budget: int,
+    ) -> None:
+        self.exhausted = False
+        self._index = index
+        self._excluded = excluded
+        self._min_spacing = min_spacing
+        self._budget = budget
+        self._expansions = 0
+        self._dead_ends: Set[Tuple[int, int]] = set()
+
+    def extend(
+        self, route: List[int], candidates: List[int], remaining: int
+    ) -> Tuple[Optional[List[int]], bool]:
+        rows = np.asarray(candidates, dtype=np.int64)
+        allowed = rows[~self._excluded.contains_many(rows)].tolist()
+        usable = [c for c in allowed if (c, remaining) not in self._dead_ends]
+        spaced = self._filter_spaced(route, usable)
+        spacing_pruned = len(spaced) < len(usable)
+        random.shuffle(spaced)
+        for row in spaced:
+            if remaining == 1:
+                return route + [row], spacing_pruned
+            if self._expansions >= self._budget:
+                self.exhausted = True
+                return None, True
+            self._expansions += 1
+            found, pruned = self.extend(
+                route + [row], self._index.neighbours(row), remaining - 1
+            )
+            if found:
+                return found, pruned
+            if not pruned:
+                self._dead_ends.add((row, remaining))
+            spacing_pruned = spacing_pruned or pruned
+        return None, spacing_pruned
+
+    def _filter_spaced(self, route: List[int], rows: List[int]) -> List[int]:
+        if not rows or not route:
+            return rows
+        latitudes, longitudes = self._index.coordinates(rows)
+        matches = np.ones(len(rows), dtype=bool)
+        for prev in route:
+            matches &= distance_util.is_at_least_many(
+                self._index.coordinate(prev), latitudes, longitudes, self._min_spacing
+            )
+        return [row for row, is_match in zip(rows, matches) if is_match]
@@ -0,0 +1,122 @@
+# Standard library
+import os
+import threading
+from typing import Any, Optional
+
+# 3rd party modules
+import requests
+from crazerace import jwt
+from prometheus_client import Counter
+from requests.adapters import HTTPAdapter
+from urllib3.connectionpool import HTTPConnectionPool, HTTPSConnectionPool
+
+# Internal modules
+from app.config import JWT_SECRET, SERVER_NAME
+
+
+_OPENED = Counter(
+    "rpc_connections_opened_total", "Connections opened for RPC calls", ["service"]
+)
+_REUSED = Counter(
+    "rpc_connections_reused_total",
+    "Kept alive connections reused by RPC calls",
+    ["service"],
+)
+
+
+class RpcClient:
+    """HTTP client for calls to another service over a pooled keep-alive session.
+
+    Each process gets its own session, since pooled connections must not be
+    shared with forked worker processes.
+    """
+
+    def __init__(
+        self,
+        service: str,
+        base_url: str,
+        pool_size: int,
+        connect_timeout: float,
+        read_timeout: float,
+    ) -> None:
+        self._service = service
+        self._base_url = base_url.rstrip("/")
+        self._pool_size = pool_size
+        self._timeout = (connect_timeout, read_timeout)
+        self._lock = threading.Lock()
+        self._session: Optional[requests.Session] = None
+        self._pid: Optional[int] = None
+
+    def get(
+        self,
+        path: str,
+        user_id: str,
+        role: str,
+        request_id: Optional[str] = None,
+    ) -> Any:
+        """Sends an authenticated GET request on behalf of a user.
+
+        :param path: Path and query relative to the base url.
+        :param user_id: Id of the user the call is made for.
+        :param role: Role of the user the call is made for.
+        :param request_id: Id of the request to propagate.
+        :return: Parsed JSON body of the response.
+        """
+        headers = {
+            "Authorization": f"Bearer {jwt.create_token(user_id, role, JWT_SECRET)}",
+            "User-Agent": SERVER_NAME,
+            "Accept": "application/json",
+        }
+        if request_id:
+            headers["X-Request-ID"] = request_id
+        res = self._get_session().get(
+            f"{self._base_url}{path}", headers=headers, timeout=self._timeout
+        )
+        res.raise_for_status()
+        return res.json()
+
+    def _get_session(self) -> requests.Session:
+        with self._lock:
+            if self._session is None or self._pid != os.getpid():
+                self._session = self._create_session()
+                self._pid = os.getpid()
+            return self._session
+
+    def _create_session(self) -> requests.Session:
+        session = requests.Session()
+        adapter = _CountingAdapter(
+            self._service,
+            pool_connections=1,
+            pool_maxsize=self._pool_size,
+            max_retries=0,
+        )
+        session.mount(f"{self._base_url}/", adapter)
+        return session
+
+
+class _CountingAdapter(HTTPAdapter):
+    def __init__(self, service: str, **kwargs: Any) -> None:
+        self._service = service
+        super().__init__(**kwargs)
+
+    def init_poolmanager(self, *args: Any, **kwargs: Any) -> None:
+        super().init_poolmanager(*args, **kwargs)
+        self.poolmanager.pool_classes_by_scheme = {
+            "http": _counting_pool(HTTPConnectionPool, self._service),
+            "https": _counting_pool(HTTPSConnectionPool, self._service),
+        }
+
+
+def _counting_pool(pool_class: type, service: str) -> type:
+    class CountingPool(pool_class):  # type: ignore
+        def _new_conn(self) -> Any:
+            _OPENED.labels(service).inc()
+            return super()._new_conn()
+
+        def _get_conn(self, timeout: Optional[float] = None) -> Any:
+            conn = super()._get_conn(timeout)
+            if getattr(conn, "sock", None) is not None:
+                _REUSED.labels(service).inc()
+            return conn
+
+    return CountingPool
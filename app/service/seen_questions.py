@@ -0,0 +1,137 @@
+# Standard library
+import threading
+from dataclasses import dataclass
+from typing import Iterable, Iterator, List, Optional
+
+# 3rd party modules
+import numpy as np
+from cachetools import TTLCache
+from crazerace.http.instrumentation import trace
+
+# Internal modules
+from app.config import SEEN_QUESTIONS_CACHE_SIZE, SEEN_QUESTIONS_CACHE_TTL
+from app.repository import question_repo
+from app.service import question_index
+from app.service.question_index import QuestionIndex
+
+
+_POPCOUNT = np.array([bin(byte).count("1") for byte in range(256)], dtype=np.int64)
+
+
+class QuestionBitset:
+    """Set of question index rows stored as a packed bit mask, one bit per row."""
+
+    def __init__(self, packed: Optional[np.ndarray] = None) -> None:
+        self.packed = packed if packed is not None else np.zeros(0, dtype=np.uint8)
+
+    @classmethod
+    def of(cls, rows: Iterable[int]) -> "QuestionBitset":
+        row_array = np.fromiter(rows, dtype=np.int64)
+        if not len(row_array):
+            return cls()
+        mask = np.zeros(int(row_array.max()) + 1, dtype=bool)
+        mask[row_array] = True
+        return cls(np.packbits(mask))
+
+    def contains_many(self, rows: np.ndarray) -> np.ndarray:
+        """Checks which of a set of rows are in the set.
+
+        :param rows: Array of rows.
+        :return: Boolean array, True for the rows in the set.
+        """
+        rows = np.asarray(rows, dtype=np.int64)
+        contained = np.zeros(len(rows), dtype=bool)
+        in_range = (rows >= 0) & (rows < len(self.packed) * 8)
+        valid_rows = rows[in_range]
+        contained[in_range] = (
+            self.packed[valid_rows >> 3] >> (7 - (valid_rows & 7)) & 1
+        ).astype(bool)
+        return contained
+
+    def __contains__(self, row: object) -> bool:
+        if not isinstance(row, (int, np.integer)):
+            return False
+        return bool(self.contains_many(np.array([row]))[0])
+
+    def __len__(self) -> int:
+        return int(_POPCOUNT[self.packed].sum())
+
+    def __iter__(self) -> Iterator[int]:
+        return iter(np.flatnonzero(np.unpackbits(self.packed)).tolist())
+
+    def __or__(self, other: "QuestionBitset") -> "QuestionBitset":
+        shorter, longer = sorted([self.packed, other.packed], key=len)
+        packed = longer.copy()
+        packed[: len(shorter)] |= shorter
+        return QuestionBitset(packed)
+
+
+@dataclass(frozen=True)
+class _CachedSeen:
+    generation: int
+    game_count: int
+    rows: QuestionBitset
+
+
+_lock = threading.Lock()
+_seen: TTLCache = TTLCache(maxsize=SEEN_QUESTIONS_CACHE_SIZE, ttl=SEEN_QUESTIONS_CACHE_TTL)
+
+
+@trace("seen_questions")
+def find_seen(user_ids: List[str], index: QuestionIndex) -> QuestionBitset:
+    """Finds the questions that any of the users have played before.
+
+    Games may have been started by other worker processes since the played
+    questions of a user were cached, so the cached rows are only used while
+    the number of started games of the user is unchanged.
+
+    :param user_ids: Ids of the users.
+    :param index: Catalog QuestionIndex that the rows refer to.
+    :return: QuestionBitset of the rows of the played questions.
+    """
+    game_counts = question_repo.find_started_game_counts(user_ids)
+    seen = QuestionBitset()
+    missing: List[str] = []
+    with _lock:
+        for user_id in user_ids:
+            cached: Optional[_CachedSeen] = _seen.get(user_id)
+            if (
+                cached
+                and cached.generation == index.generation
+                and cached.game_count == game_counts[user_id]
+            ):
+                seen |= cached.rows
+            else:
+                missing.append(user_id)
+    if not missing:
+        return seen
+    played = question_repo.find_played_question_ids(missing)
+    with _lock:
+        for user_id, question_ids in played.items():
+            user_seen = QuestionBitset.of(index.rows_of(question_ids))
+            _seen[user_id] = _CachedSeen(
+                index.generation, game_counts[user_id], user_seen
+            )
+            seen |= user_seen
+    return seen
+
+
+@trace("seen_questions")
+def mark_seen(user_ids: List[str], question_ids: List[str]) -> None:
+    """Adds the questions of a game that is being started to the cached seen
+    questions of users.
+
+    :param user_ids: Ids of the users.
+    :param question_ids: Ids of the questions the users have been assigned.
+    """
+    index = question_index.current_index()
+    if not index:
+        return
+    new_seen = QuestionBitset.of(index.rows_of(question_ids))
+    with _lock:
+        for user_id in user_ids:
+            cached: Optional[_CachedSeen] = _seen.get(user_id)
+            if cached and cached.generation == index.generation:
+                _seen[user_id] = _CachedSeen(
+                    index.generation, cached.game_count + 1, cached.rows | new_seen
+                )
@@ -0,0 +1,103 @@
+# Standard library
+import logging
+import os
+import sqlite3
+import threading
+import time
+from typing import Dict, Iterable, Optional
+
+# 3rd party modules
+from crazerace.http.instrumentation import trace
+
+
+_log = logging.getLogger(__name__)
+
+_BUSY_TIMEOUT_MS: int = 5000
+
+
+class SharedCache:
+    """TTL cache of string values stored in a sqlite file, so that it can be
+    shared by all worker processes on a node.
+
+    Every thread uses its own connection and the database runs in WAL mode, so
+    readers never block each other. When the cache grows beyond maxsize the
+    entries closest to expiry, which are the least recently written ones, are
+    evicted first.
+    """
+
+    def __init__(self, path: str, maxsize: int, ttl: float) -> None:
+        self._path = path
+        self._maxsize = maxsize
+        self._ttl = ttl
+        self._local = threading.local()
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        with self._connection() as conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS cache_entry ("
+                "key TEXT PRIMARY KEY, value TEXT NOT NULL, expires_at REAL NOT NULL)"
+            )
+            conn.execute(
+                "CREATE INDEX IF NOT EXISTS ix_cache_entry_expires_at "
+                "ON cache_entry (expires_at)"
+            )
+
+    def get(self, key: str) -> Optional[str]:
+        return self.get_many([key]).get(key)
+
+    @trace("shared_cache")
+    def get_many(self, keys: Iterable[str]) -> Dict[str, str]:
+        """Gets the unexpired values of keys.
+
+        :param keys: Keys to look up.
+        :return: Dict of the found values by key.
+        """
+        key_list = list(keys)
+        if not key_list:
+            return {}
+        placeholders = ",".join("?" * len(key_list))
+        rows = self._connection().execute(
+            f"SELECT key, value FROM cache_entry "
+            f"WHERE key IN ({placeholders}) AND expires_at > ?",
+            (*key_list, time.time()),
+        )
+        return {key: value for key, value in rows}
+
+    @trace("shared_cache")
+    def set_many(self, items: Dict[str, str]) -> None:
+        """Stores values and evicts expired entries and entries beyond maxsize.
+
+        :param items: Values by key.
+        """
+        if not items:
+            return
+        now = time.time()
+        expires_at = now + self._ttl
+        with self._connection() as conn:
+            conn.executemany(
+                "INSERT OR REPLACE INTO cache_entry (key, value, expires_at) "
+                "VALUES (?, ?, ?)",
+                [(key, value, expires_at) for key, value in items.items()],
+            )
+            conn.execute("DELETE FROM cache_entry WHERE expires_at <= ?", (now,))
+            (size,) = conn.execute("SELECT COUNT(*) FROM cache_entry").fetchone()
+            if size > self._maxsize:
+                conn.execute(
+                    "DELETE FROM cache_entry WHERE key IN ("
+                    "SELECT key FROM cache_entry ORDER BY expires_at LIMIT ?)",
+                    (size - self._maxsize,),
+                )
+
+    def clear(self) -> None:
+        with self._connection() as conn:
+            conn.execute("DELETE FROM cache_entry")
+
+    def _connection(self) -> sqlite3.Connection:
+        conn: Optional[sqlite3.Connection] = getattr(self._local, "conn", None)
+        # Connections must not be shared with forked worker processes.
+        if conn is None or self._local.pid != os.getpid():
+            conn = sqlite3.connect(self._path, timeout=_BUSY_TIMEOUT_MS / 1000)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(f"PRAGMA busy_timeout={_BUSY_TIMEOUT_MS}")
+            self._local.conn = conn
+            self._local.pid = os.getpid()
+        return conn
@@ -0,0 +1,85 @@
+# Standard library
+import threading
+from concurrent.futures import Future
+from typing import Callable, Dict, Hashable, List, Optional, TypeVar
+
+
+T = TypeVar("T")
+K = TypeVar("K", bound=Hashable)
+
+
+class SingleFlight:
+    """Coalesces concurrent calls for the same key into one call.
+
+    The first caller of a key runs the function, callers arriving while it is
+    in flight wait for it and share its result or error. Batched calls are
+    coalesced per key, so overlapping batches only call fn for the keys that
+    are not already in flight.
+    """
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._calls: Dict[Hashable, Future] = {}
+
+    def do(self, key: Hashable, fn: Callable[[], T]) -> T:
+        """Calls fn unless a call for the same key is already in flight.
+
+        :param key: Key identifying the call.
+        :param fn: Function to call.
+        :return: Result of the call.
+        """
+        with self._lock:
+            call = self._calls.get(key)
+            is_leader = call is None
+            if is_leader:
+                call = self._calls[key] = Future()
+        if not is_leader:
+            return call.result()  # type: ignore
+        try:
+            result = fn()
+            call.set_result(result)  # type: ignore
+            return result
+        except BaseException as e:
+            call.set_exception(e)  # type: ignore
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+
+    def do_many(
+        self, keys: List[K], fn: Callable[[List[K]], Dict[K, T]]
+    ) -> Dict[K, T]:
+        """Calls fn for the keys that are not already in flight and waits for
+        the calls in flight for the other keys.
+
+        :param keys: Keys identifying the calls.
+        :param fn: Function to call with the keys not in flight, returning
+            results by key. Keys missing from its result have no result.
+        :return: Results by key.
+        """
+        joined: Dict[K, Future] = {}
+        led: Dict[K, Future] = {}
+        with self._lock:
+            for key in dict.fromkeys(keys):
+                call = self._calls.get(key)
+                if call is None:
+                    led[key] = self._calls[key] = Future()
+                else:
+                    joined[key] = call
+        results: Dict[K, Optional[T]] = {}
+        if led:
+            try:
+                results.update(fn(list(led)))
+                for key, call in led.items():
+                    call.set_result(results.get(key))
+            except BaseException as e:
+                for call in led.values():
+                    call.set_exception(e)
+                raise
+            finally:
+                with self._lock:
+                    for key in led:
+                        del self._calls[key]
+        for key, call in joined.items():
+            results[key] = call.result()
+        return {key: result for key, result in results.items() if result is not None}
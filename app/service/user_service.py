@@ -1,42 +1,326 @@
 # Standard library
+import json
 import logging
+import os
+import sqlite3
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, wait
 from dataclasses import dataclass
 from datetime import datetime
-from typing import Any, Dict, List, Optional
+from typing import Any, Dict, List, Optional, Set
 
 # 3rd party libraries
-from cachetools import cached, TTLCache
-from crazerace.http import rpc, new_id
+import requests
+from cachetools import LRUCache, TTLCache
+from crazerace.http import new_id
 from crazerace.http.error import BadGatewayError
 from crazerace.http.instrumentation import trace, get_request_id
 from flask import request
 
 # Internal modules
-from app.config import USER_CACHE_SIZE, USER_CACHE_TTL, USER_SERVICE_URL, SERVER_NAME
+from app.config import USER_CACHE_SIZE, USER_CACHE_TTL, USER_SERVICE_URL
+from app.config import DATETIME_FORMAT, USER_CACHE_PATH, USER_CACHE_SOFT_TTL
+from app.config import USER_NEGATIVE_CACHE_TTL
+from app.config import USER_FETCH_BATCH_SIZE, USER_FETCH_DEADLINE, USER_FETCH_WORKERS
+from app.config import USER_REFRESH_WORKERS
+from app.config import USER_SERVICE_POOL_SIZE, USER_SERVICE_CONNECT_TIMEOUT
+from app.config import USER_SERVICE_READ_TIMEOUT, USER_LAST_KNOWN_CACHE_SIZE
+from app.config import USER_CIRCUIT_FAILURE_RATE, USER_CIRCUIT_SLOW_CALL_DURATION
+from app.config import USER_CIRCUIT_MIN_CALLS, USER_CIRCUIT_WINDOW
+from app.config import USER_CIRCUIT_OPEN_DURATION
 from app.models.external import UserDTO
+from app.service.circuit_breaker import CircuitBreaker, CircuitOpenError
+from app.service.rpc_client import RpcClient
+from app.service.shared_cache import SharedCache
+from app.service.single_flight import SingleFlight
 
 
 _log = logging.getLogger(__name__)
 
 
+@dataclass(frozen=True)
+class _Caller:
+    user_id: str
+    role: str
+    request_id: str
+
+
+@dataclass(frozen=True)
+class _CachedUser:
+    user: UserDTO
+    refresh_at: float
+
+    def is_stale(self) -> bool:
+        return self.refresh_at <= time.time()
+
+
+_lock = threading.Lock()
+_cache: TTLCache = TTLCache(maxsize=USER_CACHE_SIZE, ttl=USER_CACHE_TTL)
+_shared_cache: Optional[SharedCache] = (
+    SharedCache(USER_CACHE_PATH, maxsize=USER_CACHE_SIZE, ttl=USER_CACHE_TTL)
+    if USER_CACHE_PATH
+    else None
+)
+_failed: TTLCache = TTLCache(maxsize=USER_CACHE_SIZE, ttl=USER_NEGATIVE_CACHE_TTL)
+_last_known: LRUCache = LRUCache(maxsize=USER_LAST_KNOWN_CACHE_SIZE)
+_refreshing: Set[str] = set()
+_in_flight = SingleFlight()
+_client = RpcClient(
+    "user-service",
+    USER_SERVICE_URL,
+    pool_size=USER_SERVICE_POOL_SIZE,
+    connect_timeout=USER_SERVICE_CONNECT_TIMEOUT,
+    read_timeout=USER_SERVICE_READ_TIMEOUT,
+)
+_breaker = CircuitBreaker(
+    "user-service",
+    failure_rate=USER_CIRCUIT_FAILURE_RATE,
+    slow_call_duration=USER_CIRCUIT_SLOW_CALL_DURATION,
+    min_calls=USER_CIRCUIT_MIN_CALLS,
+    window=USER_CIRCUIT_WINDOW,
+    open_duration=USER_CIRCUIT_OPEN_DURATION,
+    is_failure=lambda e: _is_dependency_failure(e),
+)
+_executors: Dict[str, ThreadPoolExecutor] = {}
+_executors_pid: Optional[int] = None
+
+
 @trace("user_service")
 def fetch_user(user_id: str) -> UserDTO:
+    return fetch_users([user_id])[user_id]
+
+
+@trace("user_service")
+def fetch_users(user_ids: List[str]) -> Dict[str, UserDTO]:
+    """Fetches users, requesting the users missing from the cache in batches
+    that are fetched in parallel under a shared deadline. Concurrent requests
+    missing the same user share one fetch of it.
+
+    Cached users older than the soft ttl are returned as is and refreshed in
+    the background. Calls to the user service go through a circuit breaker,
+    and when it is open the last known version of the users is served even if
+    it has expired. Users that recently could not be fetched are served in the
+    same way, while the other users are still fetched.
+
+    :param user_ids: Ids of the users.
+    :return: Dict of users by id.
+    """
+    caller = _Caller(
+        user_id=request.user_id, role=request.role, request_id=get_request_id()
+    )
+    cached_users = _find_cached(user_ids)
+    stale = [user_id for user_id, cached in cached_users.items() if cached.is_stale()]
+    if stale:
+        _refresh_in_background(stale, caller)
+    users = {user_id: cached.user for user_id, cached in cached_users.items()}
+    missing = [user_id for user_id in dict.fromkeys(user_ids) if user_id not in users]
+    if not missing:
+        return users
+    failed = _find_recently_failed(missing)
+    if failed:
+        users = _with_last_known(users, failed)
+        missing = [user_id for user_id in missing if user_id not in failed]
+        if not missing:
+            return users
     try:
-        return _fetch_user_with_cache(user_id)
+        fetched = _in_flight.do_many(
+            missing,
+            lambda ids: _breaker.call(lambda: _fetch_and_cache_users(ids, caller)),
+        )
+    except CircuitOpenError:
+        return _with_last_known(users, missing)
     except Exception as e:
-        _log.error(
-            f"Fetching user failed with error=[{repr(e)}] requestId=[{get_request_id()}]"
+        _log_fetch_error(e)
+        _mark_failed(missing)
+        return _with_last_known(users, missing)
+    users.update(fetched)
+    not_found = [user_id for user_id in missing if user_id not in users]
+    if not_found:
+        _log.error(f"Users not found ids={not_found} requestId=[{get_request_id()}]")
+        _mark_failed(not_found)
+        raise BadGatewayError()
+    return users
+
+
+def _fetch_and_cache_users(
+    user_ids: List[str], caller: _Caller
+) -> Dict[str, UserDTO]:
+    if len(user_ids) == 1:
+        users = [_fetch_user(user_ids[0], caller)]
+    else:
+        users = _fetch_in_parallel(user_ids, caller)
+    _store_cached(users)
+    return {user.id: user for user in users}
+
+
+def _fetch_user(user_id: str, caller: _Caller) -> UserDTO:
+    res = _client.get(
+        f"/v1/users/{user_id}", caller.user_id, caller.role, caller.request_id
+    )
+    return UserDTO.fromdict(res)
+
+
+def _fetch_in_parallel(user_ids: List[str], caller: _Caller) -> List[UserDTO]:
+    # Worker threads have no request context, so the caller is passed explicitly.
+    executor = _get_executor("fetch", USER_FETCH_WORKERS)
+    batches = _batch(user_ids)
+    futures = [executor.submit(_fetch_users, batch, caller) for batch in batches]
+    done, not_done = wait(futures, timeout=USER_FETCH_DEADLINE)
+    for future in not_done:
+        future.cancel()
+    if not_done:
+        raise TimeoutError(
+            f"{len(not_done)} of {len(batches)} user batches exceeded the deadline"
         )
+    return [user for future in done for user in future.result()]
+
+
+def _fetch_users(user_ids: List[str], caller: _Caller) -> List[UserDTO]:
+    res = _client.get(
+        f"/v1/users?ids={','.join(user_ids)}",
+        caller.user_id,
+        caller.role,
+        caller.request_id,
+    )
+    return [UserDTO.fromdict(raw) for raw in res]
+
+
+def _refresh_in_background(user_ids: List[str], caller: _Caller) -> None:
+    with _lock:
+        to_refresh = [user_id for user_id in user_ids if user_id not in _refreshing]
+        _refreshing.update(to_refresh)
+    if to_refresh:
+        _get_executor("refresh", USER_REFRESH_WORKERS).submit(
+            _refresh, to_refresh, caller
+        )
+
+
+def _refresh(user_ids: List[str], caller: _Caller) -> None:
+    try:
+        # Refreshes run on their own small pool, so that they never hold up
+        # foreground fetches, and fetch their batches in turn.
+        users = _breaker.call(
+            lambda: [
+                user
+                for batch in _batch(user_ids)
+                for user in _fetch_users(batch, caller)
+            ]
+        )
+        _store_cached(users)
+    except CircuitOpenError:
+        pass
+    except Exception as e:
+        _log.warning(f"Refreshing users ids={user_ids} failed error=[{repr(e)}]")
+    finally:
+        with _lock:
+            _refreshing.difference_update(user_ids)
+
+
+def _batch(user_ids: List[str]) -> List[List[str]]:
+    return [
+        user_ids[i : i + USER_FETCH_BATCH_SIZE]
+        for i in range(0, len(user_ids), USER_FETCH_BATCH_SIZE)
+    ]
+
+
+def _get_executor(name: str, max_workers: int) -> ThreadPoolExecutor:
+    global _executors_pid
+    with _lock:
+        # Threads do not survive a fork, so each worker process needs its own pool.
+        if _executors_pid != os.getpid():
+            _executors.clear()
+            _executors_pid = os.getpid()
+        if name not in _executors:
+            _executors[name] = ThreadPoolExecutor(max_workers=max_workers)
+        return _executors[name]
+
+
+def _is_dependency_failure(e: Exception) -> bool:
+    # Client errors, such as unknown user ids, and malformed users say nothing
+    # about the health of the user service.
+    if isinstance(e, requests.HTTPError):
+        return e.response is None or e.response.status_code >= 500
+    return isinstance(e, (requests.ConnectionError, requests.Timeout, TimeoutError))
+
+
+def _find_recently_failed(user_ids: List[str]) -> List[str]:
+    with _lock:
+        failed = [user_id for user_id in user_ids if user_id in _failed]
+    if failed:
+        _log.info(f"Skipping recently failed users ids={failed}")
+    return failed
+
+
+def _with_last_known(
+    users: Dict[str, UserDTO], missing: List[str]
+) -> Dict[str, UserDTO]:
+    with _lock:
+        last_known = {user_id: _last_known.get(user_id) for user_id in missing}
+    not_known = [user_id for user_id, user in last_known.items() if not user]
+    if not_known:
         raise BadGatewayError()
+    _log.info(f"Serving last known users ids={missing}")
+    return {**users, **last_known}
+
+
+def _mark_failed(user_ids: List[str]) -> None:
+    with _lock:
+        for user_id in user_ids:
+            _failed[user_id] = True
+
+
+def _find_cached(user_ids: List[str]) -> Dict[str, _CachedUser]:
+    if _shared_cache:
+        try:
+            raw_users = _shared_cache.get_many(user_ids)
+            shared = {user_id: _deserialize(raw) for user_id, raw in raw_users.items()}
+        except sqlite3.Error as e:
+            _log.warning(f"Reading shared user cache failed error=[{repr(e)}]")
+            return {}
+        with _lock:
+            for user_id, cached in shared.items():
+                _last_known[user_id] = cached.user
+        return shared
+    with _lock:
+        cached_users = {user_id: _cache.get(user_id) for user_id in user_ids}
+    return {user_id: cached for user_id, cached in cached_users.items() if cached}
 
 
-@cached(cache=TTLCache(maxsize=USER_CACHE_SIZE, ttl=USER_CACHE_TTL))
-def _fetch_user_with_cache(user_id: str) -> UserDTO:
-    res = rpc.get(
-        url=f"{USER_SERVICE_URL}/v1/users/{user_id}",
-        user_id=request.user_id,
-        role=request.role,
-        headers={"User-Agent": SERVER_NAME},
+def _store_cached(users: List[UserDTO]) -> None:
+    refresh_at = time.time() + USER_CACHE_SOFT_TTL
+    cached_users = [_CachedUser(user=user, refresh_at=refresh_at) for user in users]
+    with _lock:
+        for user in users:
+            _last_known[user.id] = user
+    if _shared_cache:
+        try:
+            _shared_cache.set_many({c.user.id: _serialize(c) for c in cached_users})
+        except sqlite3.Error as e:
+            _log.warning(f"Writing shared user cache failed error=[{repr(e)}]")
+        return
+    with _lock:
+        for cached in cached_users:
+            _cache[cached.user.id] = cached
+
+
+def _serialize(cached: _CachedUser) -> str:
+    return json.dumps(
+        {
+            "id": cached.user.id,
+            "username": cached.user.username,
+            "createdAt": cached.user.created_at.strftime(DATETIME_FORMAT),
+            "refreshAt": cached.refresh_at,
+        }
     )
-    return UserDTO.fromdict(res.json)
 
+
+def _deserialize(raw: str) -> _CachedUser:
+    values = json.loads(raw)
+    return _CachedUser(user=UserDTO.fromdict(values), refresh_at=values["refreshAt"])
+
+
+def _log_fetch_error(e: Exception) -> None:
+    _log.error(
+        f"Fetching user failed with error=[{repr(e)}] requestId=[{get_request_id()}]"
+    )
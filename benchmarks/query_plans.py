@@ -0,0 +1,215 @@
+"""Shows the query plans of the hot game queries with and without the lookup
+indexes on a synthetic dataset.
+
+Runs against the database the app is configured for, so run it with
+TEST_MODE=1 for SQLite or point the DB_* variables at an empty Postgres
+database. The tables are created and dropped by the script.
+
+    TEST_MODE=1 python -m benchmarks.query_plans --games 2000
+"""
+# Standard library
+import argparse
+import random
+import time
+from datetime import datetime
+from typing import Any, Dict, List
+from uuid import uuid4
+
+# 3rd party modules
+from sqlalchemy import text
+from sqlalchemy.engine import Engine
+
+# Internal modules
+from app import app, db
+from app.models import Game, GameMember, GameMemberQuestion, GameQuestion
+from app.models import Position, Question
+
+
+LOOKUP_INDEXES = [
+    "ix_game_member_position_game_member_id",
+    "ix_game_member_question_game_question_id",
+    "ix_game_member_question_member_id_unanswered",
+    "ix_game_question_game_id",
+]
+
+QUERIES: Dict[str, str] = {
+    "members of game": "SELECT id FROM game_member WHERE game_id = :game_id",
+    "questions of game": "SELECT id FROM game_question WHERE game_id = :game_id",
+    "active question of member": (
+        "SELECT id, game_question_id FROM game_member_question "
+        "WHERE member_id = :member_id AND answered_at IS NULL"
+    ),
+    "members of game question": (
+        "SELECT member_id FROM game_member_question "
+        "WHERE game_question_id = :game_question_id"
+    ),
+    "positions of member": (
+        "SELECT id, latitude, longitude FROM game_member_position "
+        "WHERE game_member_id = :member_id"
+    ),
+}
+
+_BATCH_SIZE = 10000
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--games", type=int, default=2000)
+    parser.add_argument("--members", type=int, default=4, help="Members per game")
+    parser.add_argument("--questions", type=int, default=5, help="Questions per game")
+    parser.add_argument(
+        "--positions", type=int, default=50, help="Positions per member"
+    )
+    parser.add_argument("--repeat", type=int, default=100)
+    args = parser.parse_args()
+
+    with app.app_context():
+        engine = db.engine
+        if engine.has_table("game"):
+            raise SystemExit("Refusing to run against a database with game tables")
+        db.create_all()
+        try:
+            params = _insert_dataset(engine, args)
+            _analyze(engine)
+            _explain_all(engine, params, args.repeat, "without indexes", drop=True)
+            _explain_all(engine, params, args.repeat, "with indexes", drop=False)
+        finally:
+            db.session.remove()
+            db.drop_all()
+
+
+def _insert_dataset(engine: Engine, args: argparse.Namespace) -> Dict[str, Any]:
+    now = datetime.utcnow()
+    question_ids = [str(uuid4()) for _ in range(args.questions * 10)]
+    _insert(
+        engine,
+        Question,
+        [
+            {
+                "id": question_id,
+                "latitude": 59.3 + random.random() / 10,
+                "longitude": 18.0 + random.random() / 10,
+                "text": "text",
+                "text_en": "text",
+                "answer": "answer",
+                "answer_en": "answer",
+                "created_at": now,
+            }
+            for question_id in question_ids
+        ],
+    )
+    games: List[Dict[str, Any]] = []
+    members: List[Dict[str, Any]] = []
+    game_questions: List[Dict[str, Any]] = []
+    member_questions: List[Dict[str, Any]] = []
+    positions: List[Dict[str, Any]] = []
+    for game_no in range(args.games):
+        game_id = str(uuid4())
+        games.append(
+            {
+                "id": game_id,
+                "name": f"game-{game_no}",
+                "started_at": now,
+                "created_at": now,
+            }
+        )
+        first_question = game_no * args.questions + 1
+        game_question_ids = list(
+            range(first_question, first_question + args.questions)
+        )
+        game_questions.extend(
+            {
+                "id": gq_id,
+                "game_id": game_id,
+                "question_id": random.choice(question_ids),
+            }
+            for gq_id in game_question_ids
+        )
+        for _ in range(args.members):
+            member_id = str(uuid4())
+            members.append(
+                {
+                    "id": member_id,
+                    "game_id": game_id,
+                    "user_id": str(uuid4()),
+                    "is_admin": False,
+                    "is_ready": True,
+                    "created_at": now,
+                }
+            )
+            answered = random.randrange(args.questions)
+            member_questions.extend(
+                {
+                    "member_id": member_id,
+                    "game_question_id": gq_id,
+                    "answered_at": now if i < answered else None,
+                    "created_at": now,
+                }
+                for i, gq_id in enumerate(game_question_ids[: answered + 1])
+            )
+            positions.extend(
+                {
+                    "id": str(uuid4()),
+                    "game_member_id": member_id,
+                    "latitude": 59.3,
+                    "longitude": 18.0,
+                    "created_at": now,
+                }
+                for _ in range(args.positions)
+            )
+    _insert(engine, Game, games)
+    _insert(engine, GameQuestion, game_questions)
+    _insert(engine, GameMember, members)
+    _insert(engine, GameMemberQuestion, member_questions)
+    _insert(engine, Position, positions)
+    print(
+        f"Inserted games={len(games)} members={len(members)} "
+        f"member_questions={len(member_questions)} positions={len(positions)}"
+    )
+    member = random.choice(members)
+    return {
+        "game_id": member["game_id"],
+        "member_id": member["id"],
+        "game_question_id": random.choice(game_questions)["id"],
+    }
+
+
+def _insert(engine: Engine, model: db.Model, rows: List[Dict[str, Any]]) -> None:
+    for i in range(0, len(rows), _BATCH_SIZE):
+        engine.execute(model.__table__.insert(), rows[i : i + _BATCH_SIZE])
+
+
+def _analyze(engine: Engine) -> None:
+    engine.execute(text("ANALYZE"))
+
+
+def _explain_all(
+    engine: Engine, params: Dict[str, Any], repeat: int, title: str, drop: bool
+) -> None:
+    indexes = [
+        index
+        for table in db.metadata.sorted_tables
+        for index in table.indexes
+        if index.name in LOOKUP_INDEXES
+    ]
+    for index in indexes:
+        if drop:
+            index.drop(engine)
+        else:
+            index.create(engine)
+    _analyze(engine)
+    print(f"\n=== {title} ===")
+    explain = "EXPLAIN QUERY PLAN" if engine.dialect.name == "sqlite" else "EXPLAIN"
+    for name, query in QUERIES.items():
+        plan = engine.execute(text(f"{explain} {query}"), params).fetchall()
+        start = time.perf_counter()
+        for _ in range(repeat):
+            engine.execute(text(query), params).fetchall()
+        elapsed_ms = (time.perf_counter() - start) / repeat * 1000
+        print(f"\n{name}: {elapsed_ms:.3f} ms")
+        for row in plan:
+            print(f"  {row[-1]}")
+
+
+if __name__ == "__main__":
+    main()
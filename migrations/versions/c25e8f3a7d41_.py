@@ -0,0 +1,97 @@
+"""empty message
+
+Revision ID: c25e8f3a7d41
+Revises: a7d4e2b9c813
+Create Date: 2026-10-18 16:03:52.174409
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision = 'c25e8f3a7d41'
+down_revision = 'a7d4e2b9c813'
+branch_labels = None
+depends_on = None
+
+
+# (table, column, referenced table) of every foreign key to a uuid column.
+FOREIGN_KEYS = [
+    ('game_member', 'game_id', 'game'),
+    ('game_question', 'game_id', 'game'),
+    ('game_question', 'question_id', 'question'),
+    ('game_member_position', 'game_member_id', 'game_member'),
+    ('game_placement', 'game_id', 'game'),
+    ('game_placement', 'member_id', 'game_member'),
+    ('game_member_question', 'member_id', 'game_member'),
+    ('game_member_question', 'position_id', 'game_member_position'),
+]
+
+UUID_COLUMNS = [
+    ('game', 'id'),
+    ('question', 'id'),
+    ('game_member', 'id'),
+    ('game_member_position', 'id'),
+] + [(table, column) for table, column, _ in FOREIGN_KEYS]
+
+
+UUID_PATTERN = '^[0-9a-fA-F]{8}-?([0-9a-fA-F]{4}-?){3}[0-9a-fA-F]{12}$'
+
+
+def upgrade():
+    if op.get_bind().dialect.name != 'postgresql':
+        return
+    _assert_uuid_values()
+    _drop_foreign_keys()
+    for table, column in UUID_COLUMNS:
+        op.alter_column(table, column,
+               existing_type=sa.String(length=50),
+               type_=postgresql.UUID(),
+               postgresql_using=f'{column}::uuid')
+    _create_foreign_keys()
+
+
+def downgrade():
+    if op.get_bind().dialect.name != 'postgresql':
+        return
+    _drop_foreign_keys()
+    for table, column in UUID_COLUMNS:
+        op.alter_column(table, column,
+               existing_type=postgresql.UUID(),
+               type_=sa.String(length=50),
+               postgresql_using=f'{column}::text')
+    _create_foreign_keys()
+
+
+def _assert_uuid_values():
+    # Casting aborts on the first malformed id, so all of them are listed up
+    # front for cleanup before the migration is run again.
+    conn = op.get_bind()
+    invalid = []
+    for table, column in UUID_COLUMNS:
+        count = conn.execute(
+            sa.text(
+                f'SELECT COUNT(*) FROM {table} '
+                f'WHERE {column} IS NOT NULL AND {column} !~ :pattern'
+            ),
+            pattern=UUID_PATTERN,
+        ).scalar()
+        if count:
+            invalid.append(f'{table}.{column}: {count} rows')
+    if invalid:
+        raise RuntimeError(
+            'Ids that are not UUIDs must be removed before migrating: '
+            + ', '.join(invalid)
+        )
+
+
+def _drop_foreign_keys():
+    for table, column, _ in FOREIGN_KEYS:
+        op.drop_constraint(f'{table}_{column}_fkey', table, type_='foreignkey')
+
+
+def _create_foreign_keys():
+    for table, column, referenced in FOREIGN_KEYS:
+        op.create_foreign_key(f'{table}_{column}_fkey', table, referenced, [column], ['id'])
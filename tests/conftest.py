@@ -0,0 +1,15 @@
+# 3rd party modules
+import pytest
+
+# Intenal modules
+from app.service import question_index, question_snapshot
+
+
+@pytest.fixture(autouse=True)
+def question_snapshot_dir(tmp_path, monkeypatch):
+    """Keeps the question snapshot of every test in its own temporary directory,
+    instead of the directory shared by all runs on the machine."""
+    snapshot_dir = str(tmp_path / "question-snapshot")
+    monkeypatch.setattr(question_snapshot, "QUESTION_SNAPSHOT_DIR", snapshot_dir)
+    monkeypatch.setattr(question_index, "_index", None)
+    monkeypatch.setattr(question_index, "_header", None)
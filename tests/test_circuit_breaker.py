@@ -0,0 +1,144 @@
+# 3rd party modules
+import pytest
+
+# Intenal modules
+from app.service.circuit_breaker import CircuitBreaker, CircuitOpenError
+from app.service.circuit_breaker import CLOSED, OPEN, HALF_OPEN
+
+
+class _Clock:
+    def __init__(self) -> None:
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def _breaker(clock: _Clock) -> CircuitBreaker:
+    return CircuitBreaker(
+        "test",
+        failure_rate=0.5,
+        slow_call_duration=1.0,
+        min_calls=4,
+        window=10,
+        open_duration=5,
+        clock=clock,
+    )
+
+
+def _fail() -> None:
+    raise ValueError("failed")
+
+
+def test_circuit_breaker_opens_on_failure_rate():
+    clock = _Clock()
+    breaker = _breaker(clock)
+    assert breaker.call(lambda: 1) == 1
+    assert breaker.call(lambda: 2) == 2
+    with pytest.raises(ValueError):
+        breaker.call(_fail)
+    assert breaker.state == CLOSED
+    with pytest.raises(ValueError):
+        breaker.call(_fail)
+    assert breaker.state == OPEN
+
+    calls = []
+    with pytest.raises(CircuitOpenError):
+        breaker.call(lambda: calls.append(1))
+    assert calls == []
+
+
+def test_circuit_breaker_forgets_calls_outside_window():
+    clock = _Clock()
+    breaker = _breaker(clock)
+    for _ in range(3):
+        with pytest.raises(ValueError):
+            breaker.call(_fail)
+    clock.now = 11
+    breaker.call(lambda: None)
+    assert breaker.state == CLOSED
+
+
+def test_circuit_breaker_counts_slow_calls_as_failures():
+    clock = _Clock()
+    breaker = _breaker(clock)
+
+    def slow_call() -> None:
+        clock.now += 2
+
+    for _ in range(4):
+        breaker.call(slow_call)
+    assert breaker.state == OPEN
+
+
+def test_circuit_breaker_probes_when_half_open():
+    clock = _Clock()
+    breaker = _breaker(clock)
+    for _ in range(4):
+        with pytest.raises(ValueError):
+            breaker.call(_fail)
+    clock.now += 5
+    assert breaker.state == HALF_OPEN
+
+    with pytest.raises(ValueError):
+        breaker.call(_fail)
+    assert breaker.state == OPEN
+    with pytest.raises(CircuitOpenError):
+        breaker.call(lambda: None)
+
+    clock.now += 5
+
+    def probe() -> str:
+        with pytest.raises(CircuitOpenError):
+            breaker.call(lambda: None)
+        return "ok"
+
+    assert breaker.call(probe) == "ok"
+    assert breaker.state == CLOSED
+    assert breaker.call(lambda: 1) == 1
+
+
+def test_circuit_breaker_closes_probe_interrupted_by_base_exception():
+    clock = _Clock()
+    breaker = _breaker(clock)
+    for _ in range(4):
+        with pytest.raises(ValueError):
+            breaker.call(_fail)
+    clock.now += 5
+
+    def interrupted() -> None:
+        raise KeyboardInterrupt()
+
+    with pytest.raises(KeyboardInterrupt):
+        breaker.call(interrupted)
+    assert breaker.state == OPEN
+
+    clock.now += 5
+    assert breaker.call(lambda: 1) == 1
+    assert breaker.state == CLOSED
+
+
+def test_circuit_breaker_ignores_exceptions_that_are_not_failures():
+    clock = _Clock()
+    breaker = CircuitBreaker(
+        "test",
+        failure_rate=0.5,
+        slow_call_duration=1.0,
+        min_calls=4,
+        window=10,
+        open_duration=5,
+        clock=clock,
+        is_failure=lambda e: not isinstance(e, ValueError),
+    )
+    for _ in range(4):
+        with pytest.raises(ValueError):
+            breaker.call(_fail)
+    assert breaker.state == CLOSED
+
+    def _crash() -> None:
+        raise RuntimeError("crashed")
+
+    for _ in range(4):
+        with pytest.raises(RuntimeError):
+            breaker.call(_crash)
+    assert breaker.state == OPEN
@@ -1,3 +1,6 @@
+# 3rd party modules
+import numpy as np
+
 # Intenal modules
 from app.models.dto import CoordinateDTO
 from app.service import distance_util
@@ -47,3 +50,53 @@ def test_is_at_least():
     assert distance_util.is_at_least(origin, destination, min_dist=500)
     assert not distance_util.is_at_least(origin, destination, min_dist=600)
 
+
+def test_calculate_many():
+    origin = CoordinateDTO(latitude=59.318329, longitude=18.042192)
+    destinations = [
+        CoordinateDTO(latitude=59.318329, longitude=18.042192),
+        CoordinateDTO(latitude=59.316556, longitude=18.033478),
+        CoordinateDTO(latitude=59.318134, longitude=18.063666),
+        CoordinateDTO(latitude=59.326934, longitude=18.103433),
+    ]
+    latitudes = np.array([d.latitude for d in destinations])
+    longitudes = np.array([d.longitude for d in destinations])
+
+    distances = distance_util.calculate_many(origin, latitudes, longitudes)
+    assert len(distances) == len(destinations)
+    for distance, destination in zip(distances, destinations):
+        assert abs(distance - distance_util.calculate(origin, destination)) <= 1
+
+    assert len(distance_util.calculate_many(origin, np.array([]), np.array([]))) == 0
+
+
+def test_is_within_many_and_is_at_least_many():
+    origin = CoordinateDTO(latitude=59.318329, longitude=18.042192)
+    latitudes = np.array([59.316556, 59.318134, 59.326934])  # 532, 1218, 3603 meters
+    longitudes = np.array([18.033478, 18.063666, 18.103433])
+
+    within = distance_util.is_within_many(
+        origin, latitudes, longitudes, max_dist=3000, min_dist=1000
+    )
+    assert within.tolist() == [False, True, False]
+    within = distance_util.is_within_many(origin, latitudes, longitudes, max_dist=3000)
+    assert within.tolist() == [True, True, False]
+
+    at_least = distance_util.is_at_least_many(origin, latitudes, longitudes, min_dist=600)
+    assert at_least.tolist() == [False, True, True]
+
+
+def test_bounding_box():
+    origin = CoordinateDTO(latitude=59.318329, longitude=18.042192)
+    box = distance_util.bounding_box(origin, 3000)
+    assert box.contains(origin.latitude, origin.longitude)
+    for latitude, longitude in [
+        (box.min_latitude, origin.longitude),
+        (box.max_latitude, origin.longitude),
+        (origin.latitude, box.min_longitude),
+        (origin.latitude, box.max_longitude),
+    ]:
+        edge = CoordinateDTO(latitude=latitude, longitude=longitude)
+        assert distance_util.calculate(origin, edge) >= 3000
+
+    assert not box.contains(59.326934, 18.103433)  # 3603 meters from origin
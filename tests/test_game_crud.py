@@ -11,20 +11,21 @@ from tests import TestEnvironment, JSON, headers, new_id
 from app.config import USER_SERVICE_URL
 from app.models import Game, GameMember, GameQuestion, Question
 from app.repository import game_repo
-from app.service import game_service
+from app.service import game_service, user_service
 
 
 def test_create_game():
     with TestEnvironment() as client:
         # Ok game data
-        game = json.dumps({"name": "MyGame", "id": "asd123"})
+        game_id = new_id()
+        game = json.dumps({"name": "MyGame", "id": game_id})
         headers_ok = headers(new_id())
         res = client.post("/v1/games", data=game, content_type=JSON, headers=headers_ok)
         assert res.status_code == status.HTTP_200_OK
         assert res.get_json()["name"] == "MyGame"
-        assert res.get_json()["id"] == "asd123"
+        assert res.get_json()["id"] == game_id
 
-        game = game_repo.find("asd123")
+        game = game_repo.find(game_id)
         assert game.name == "MyGame"
 
         game = json.dumps({"name": "gameWithoutId"})
@@ -38,14 +39,21 @@ def test_create_game():
         assert game.name == "gameWithoutId"
 
         # Incorrect game data types
-        game = json.dumps({"id": "asd123", "name": True})
+        game = json.dumps({"id": new_id(), "name": True})
         res_bad_req = client.post(
             "/v1/games", data=game, content_type=JSON, headers=headers_ok
         )
         assert res_bad_req.status_code == status.HTTP_400_BAD_REQUEST
 
-        # Duplicate game id
+        # Game id that is not a UUID
         game = json.dumps({"name": "MyGame", "id": "asd123"})
+        res_bad_id = client.post(
+            "/v1/games", data=game, content_type=JSON, headers=headers_ok
+        )
+        assert res_bad_id.status_code == status.HTTP_400_BAD_REQUEST
+
+        # Duplicate game id
+        game = json.dumps({"name": "MyGame", "id": game_id})
         res_dup_game_id = client.post(
             "/v1/games", data=game, content_type=JSON, headers=headers_ok
         )
@@ -236,21 +244,19 @@ def test_get_game():
     )
     with requests_mock.mock() as m:
         m.get(
-            f"{USER_SERVICE_URL}/v1/users/user-1",
-            json={
-                "id": "user-1",
-                "username": "User 1",
-                "createdAt": "2019-01-01 12:12:12.222",
-            },
-            headers={"Content-Type": "application/json"},
-        )
-        m.get(
-            f"{USER_SERVICE_URL}/v1/users/user-2",
-            json={
-                "id": "user-2",
-                "username": "User 2",
-                "createdAt": "2019-01-01 12:12:12.222",
-            },
+            f"{USER_SERVICE_URL}/v1/users?ids=user-1,user-2",
+            json=[
+                {
+                    "id": "user-1",
+                    "username": "User 1",
+                    "createdAt": "2019-01-01 12:12:12.222",
+                },
+                {
+                    "id": "user-2",
+                    "username": "User 2",
+                    "createdAt": "2019-01-01 12:12:12.222",
+                },
+            ],
             headers={"Content-Type": "application/json"},
         )
         with TestEnvironment([question_1, question_2, game_1, game_2, game_3]) as client:
@@ -311,6 +317,50 @@ def test_get_game():
             res_missing = client.get(f"/v1/games/{new_id()}", headers=headers_ok)
             assert res_missing.status_code == status.HTTP_404_NOT_FOUND
 
+            # Users are fetched in one call and then served from the cache.
+            assert m.call_count == 1
+
+
+def test_get_game_fetches_user_batches_in_parallel(monkeypatch):
+    monkeypatch.setattr(user_service, "USER_FETCH_BATCH_SIZE", 1)
+    game_id = new_id()
+    user_ids = [new_id() for _ in range(3)]
+    game = Game(
+        id=game_id,
+        name="Batched game",
+        created_at=datetime.utcnow(),
+        members=[
+            GameMember(
+                id=new_id(),
+                game_id=game_id,
+                user_id=user_id,
+                is_admin=i == 0,
+                created_at=datetime.utcnow(),
+            )
+            for i, user_id in enumerate(user_ids)
+        ],
+    )
+    with requests_mock.mock() as m:
+        for i, user_id in enumerate(user_ids):
+            m.get(
+                f"{USER_SERVICE_URL}/v1/users?ids={user_id}",
+                json=[
+                    {
+                        "id": user_id,
+                        "username": f"User {i}",
+                        "createdAt": "2019-01-01 12:12:12.222",
+                    }
+                ],
+                headers={"Content-Type": "application/json"},
+            )
+        with TestEnvironment([game]) as client:
+            res = client.get(f"/v1/games/{game_id}", headers=headers(user_ids[0]))
+            assert res.status_code == status.HTTP_200_OK
+            members = res.get_json()["members"]
+            usernames = sorted(member["user"]["username"] for member in members)
+            assert usernames == ["User 0", "User 1", "User 2"]
+            assert m.call_count == 3
+
 
 def test_get_game_by_shortcode():
     two_hours_ago: datetime = datetime.utcnow() - timedelta(hours=2)
@@ -358,6 +408,15 @@ def test_get_game_by_shortcode():
         )
         assert res_missing.status_code == status.HTTP_404_NOT_FOUND
 
+        res_not_hex = client.get(f"/v1/games/shortcode/zz12", headers=headers_ok)
+        assert res_not_hex.status_code == status.HTTP_404_NOT_FOUND
+
+        res_upper_case = client.get(
+            f"/v1/games/shortcode/{game_2_id[:4].upper()}", headers=headers_ok
+        )
+        assert res_upper_case.status_code == status.HTTP_200_OK
+        assert res_upper_case.get_json()["id"] == game_2_id
+
         res_invalid_shortcode_length = client.get(
             f"/v1/games/shortcode/{new_id()[:6]}", headers=headers_ok
         )
@@ -0,0 +1,137 @@
+# Standard library
+from datetime import datetime
+from typing import List
+
+# 3rd party modules
+from crazerace.http import status
+
+# Intenal modules
+from tests import TestEnvironment, JSON, headers, new_id
+from app import db
+from app.models import Question, Game, GameMember, GameQuestion, GameMemberQuestion
+from app.models import Position
+from app.repository import position_repo
+from app.service import game_state_cache
+
+
+def _live_game(
+    game_id: str, member_id: str, user_id: str, question_ids: List[str]
+) -> List[db.Model]:
+    now = datetime.utcnow()
+    questions = [
+        Question(
+            id=question_id,
+            latitude=59.318134 + i * 0.01,
+            longitude=18.063666,
+            text="t",
+            text_en="t-en",
+            answer="a",
+            answer_en="a-en",
+        )
+        for i, question_id in enumerate(question_ids)
+    ]
+    game = Game(
+        id=game_id,
+        name="Test game",
+        created_at=now,
+        started_at=now,
+        members=[
+            GameMember(
+                id=member_id,
+                game_id=game_id,
+                user_id=user_id,
+                is_admin=True,
+                is_ready=True,
+                created_at=now,
+            )
+        ],
+        questions=[
+            GameQuestion(id=1, game_id=game_id, question_id=question_ids[0]),
+            GameQuestion(id=2, game_id=game_id, question_id=question_ids[1]),
+        ],
+    )
+    member_question = GameMemberQuestion(
+        member_id=member_id, game_question_id=1, created_at=now
+    )
+    return [*questions, game, member_question]
+
+
+def test_game_state_cache():
+    now = datetime.utcnow()
+    game_id = new_id()
+    member_id = new_id()
+    user_id = new_id()
+    question_ids = [new_id(), new_id()]
+    unstarted_game_id = new_id()
+    unstarted_game = Game(id=unstarted_game_id, name="Unstarted", created_at=now)
+
+    db_items = [*_live_game(game_id, member_id, user_id, question_ids), unstarted_game]
+    with TestEnvironment(db_items) as client:
+        state = game_state_cache.find(game_id)
+        assert [q.id for q in state.questions] == question_ids
+        member = state.members[member_id]
+        assert member.user_id == user_id
+        assert member.answered_count == 0
+        assert member.active_question.question.id == question_ids[0]
+
+        context = game_state_cache.find_position_context(game_id, member_id)
+        assert context.is_cached
+        assert context.question_count == 2
+        assert game_state_cache.find_position_context(game_id, new_id()) is None
+
+        Game.query.filter(Game.id == game_id).update({"ended_at": now})
+        db.session.commit()
+        assert game_state_cache.find(game_id) is state
+        game_state_cache.invalidate(game_id)
+        assert game_state_cache.find(game_id) is None
+
+        assert game_state_cache.find(unstarted_game_id) is None
+
+
+def test_next_question_is_not_served_from_stale_cache():
+    game_id = new_id()
+    member_id = new_id()
+    user_id = new_id()
+    question_ids = [new_id(), new_id()]
+    db_items = _live_game(game_id, member_id, user_id, question_ids)
+    url = f"/v1/games/{game_id}/members/{member_id}/next-question?lat=59.3&long=18.06"
+    with TestEnvironment(db_items) as client:
+        res = client.get(url, headers=headers(user_id), content_type=JSON)
+        assert res.status_code == status.HTTP_200_OK
+        assert res.get_json()["id"] == question_ids[0]
+        assert game_state_cache.find(game_id).members[member_id].active_question
+
+        # Answered through another worker, which cannot invalidate this cache.
+        member_question = GameMemberQuestion.query.filter(
+            GameMemberQuestion.member_id == member_id
+        ).one()
+        position = Position(
+            id=new_id(),
+            game_member_id=member_id,
+            latitude=59.318134,
+            longitude=18.063666,
+            created_at=datetime.utcnow(),
+        )
+        position_repo.save_answer(position, member_question.id)
+
+        res = client.get(url, headers=headers(user_id), content_type=JSON)
+        assert res.status_code == status.HTTP_200_OK
+        assert res.get_json()["id"] == question_ids[1]
+
+
+def test_next_question_is_not_served_for_ended_game():
+    game_id = new_id()
+    member_id = new_id()
+    user_id = new_id()
+    question_ids = [new_id(), new_id()]
+    db_items = _live_game(game_id, member_id, user_id, question_ids)
+    url = f"/v1/games/{game_id}/members/{member_id}/next-question?lat=59.3&long=18.06"
+    with TestEnvironment(db_items) as client:
+        assert game_state_cache.find(game_id).members[member_id].active_question
+
+        # Ended through another worker, which cannot invalidate this cache.
+        Game.query.filter(Game.id == game_id).update({"ended_at": datetime.utcnow()})
+        db.session.commit()
+
+        res = client.get(url, headers=headers(user_id), content_type=JSON)
+        assert res.status_code == status.HTTP_428_PRECONDITION_REQUIRED
@@ -0,0 +1,45 @@
+# 3rd party modules
+import numpy as np
+
+# Intenal modules
+from tests import new_id
+from app.models.dto import CoordinateDTO, QuestionCoordinateDTO
+from app.service import geofence
+
+
+def test_geofence_contains():
+    question = QuestionCoordinateDTO(id=new_id(), latitude=59.318134, longitude=18.063666)
+    fence = geofence.create(new_id(), question, radius=10)
+
+    assert fence.contains(CoordinateDTO(latitude=59.318078, longitude=18.063551))
+    # Inside the bounding box but about 12 meters from the question.
+    assert fence.bounds.contains(59.318054, 18.063516)
+    assert not fence.contains(CoordinateDTO(latitude=59.318054, longitude=18.063516))
+    assert not fence.contains(CoordinateDTO(latitude=59.3181, longitude=18.0625))
+    assert not fence.contains(CoordinateDTO(latitude=59.317, longitude=18.063))
+
+    latitudes = np.array([59.317, 59.3181, 59.318078, 59.318134])
+    longitudes = np.array([18.063, 18.0625, 18.063551, 18.063666])
+    assert fence.contains_many(latitudes, longitudes).tolist() == [
+        False,
+        False,
+        True,
+        True,
+    ]
+
+
+def test_geofence_find():
+    member_id = new_id()
+    question = QuestionCoordinateDTO(id=new_id(), latitude=59.318134, longitude=18.063666)
+    other_question = QuestionCoordinateDTO(id=new_id(), latitude=59.31, longitude=18.06)
+
+    fence = geofence.create(member_id, question)
+    assert geofence.find(member_id, question) is fence
+
+    other_fence = geofence.find(member_id, other_question)
+    assert other_fence.question_id == other_question.id
+    assert other_fence.center == other_question.coordinate()
+    assert geofence.find(member_id, other_question) is other_fence
+
+    geofence.remove(member_id)
+    assert geofence.find(member_id, other_question) is not other_fence
@@ -0,0 +1,60 @@
+# Standard library
+import time
+from datetime import datetime
+from typing import List
+
+# Intenal modules
+from tests import new_id
+from app.models import Position
+from app.service.position_buffer import PositionBuffer
+
+
+def _position() -> Position:
+    return Position(
+        id=new_id(),
+        game_member_id=new_id(),
+        latitude=59.318134,
+        longitude=18.063666,
+        created_at=datetime.utcnow(),
+    )
+
+
+def test_position_buffer_flushes_by_size():
+    saved: List[List[Position]] = []
+    buffer = PositionBuffer(saved.append, flush_size=3, flush_interval=60, max_size=10)
+
+    buffer.add(_position())
+    buffer.add(_position())
+    assert len(buffer) == 2
+    assert saved == []
+
+    buffer.add(_position())
+    assert len(buffer) == 0
+    assert len(saved) == 1 and len(saved[0]) == 3
+
+    assert buffer.flush("shutdown") == 0
+    assert len(saved) == 1
+
+
+def test_position_buffer_flushes_by_age():
+    saved: List[List[Position]] = []
+    buffer = PositionBuffer(saved.append, flush_size=100, flush_interval=0.05)
+
+    assert buffer.flush_if_due() == 0
+    buffer.add(_position())
+    assert buffer.flush_if_due() == 0
+
+    time.sleep(0.1)
+    assert buffer.flush_if_due() == 1
+    assert len(buffer) == 0
+    assert len(saved) == 1
+
+
+def test_position_buffer_drops_failed_flush():
+    def failing_save(positions: List[Position]) -> None:
+        raise ValueError("Database unavailable")
+
+    buffer = PositionBuffer(failing_save, flush_size=100, flush_interval=60)
+    buffer.add(_position())
+    assert buffer.flush("shutdown") == 1
+    assert len(buffer) == 0
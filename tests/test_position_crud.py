@@ -7,7 +7,9 @@ from crazerace.http import status
 
 # Intenal modules
 from tests import TestEnvironment, JSON, headers, new_id
+from app.config import DATETIME_FORMAT, POSITION_BATCH_MAX_SIZE
 from app.repository import position_repo, question_repo, placement_repo
+from app.service import position_service
 from app.models import (
     Question,
     Game,
@@ -19,6 +21,10 @@ from app.models import (
 )
 
 
+def _fix_time(now: datetime, seconds_ago: int) -> str:
+    return (now - timedelta(seconds=seconds_ago)).strftime(DATETIME_FORMAT)
+
+
 def test_add_position():
     now = datetime.utcnow()
     one_minute_ago = now - timedelta(minutes=1)
@@ -244,3 +250,397 @@ def test_add_position():
             == status.HTTP_428_PRECONDITION_REQUIRED
         )
         assert res_get_next_question_ended_game.get_json()["errorId"] == "GAME_ENDED"
+
+
+def test_add_positions():
+    now = datetime.utcnow()
+    game_id = new_id()
+    user_id = new_id()
+    member_id = new_id()
+
+    question_id = new_id()
+    question = Question(
+        id=question_id,
+        latitude=59.318134,
+        longitude=18.063666,
+        text="t1",
+        text_en="t1-en",
+        answer="a1",
+        answer_en="a1-en",
+    )
+
+    game = Game(
+        id=game_id,
+        name="Test game",
+        created_at=now,
+        started_at=now,
+        members=[
+            GameMember(
+                id=member_id,
+                game_id=game_id,
+                user_id=user_id,
+                is_admin=True,
+                is_ready=True,
+                created_at=now,
+            )
+        ],
+        questions=[GameQuestion(id=1, game_id=game_id, question_id=question_id)],
+    )
+
+    member_question = GameMemberQuestion(
+        member_id=member_id,
+        game_question_id=1,
+        position_id=None,
+        answered_at=None,
+        created_at=now,
+    )
+
+    with TestEnvironment([question, game, member_question]) as client:
+        url = f"/v1/games/{game_id}/members/{member_id}/positions"
+
+        res_empty = client.post(
+            url,
+            headers=headers(user_id),
+            content_type=JSON,
+            data=json.dumps({"positions": []}),
+        )
+        assert res_empty.status_code == status.HTTP_400_BAD_REQUEST
+
+        res_bad_id = client.post(
+            url,
+            headers=headers(user_id),
+            content_type=JSON,
+            data=json.dumps(
+                {"positions": [{"id": "asd123", "latitude": 59.3, "longitude": 18.0}]}
+            ),
+        )
+        assert res_bad_id.status_code == status.HTTP_400_BAD_REQUEST
+
+        for bad_positions in [
+            [1],
+            [{"latitude": None, "longitude": 18.0}],
+            [{"latitude": 59.3, "longitude": 18.0}] * (POSITION_BATCH_MAX_SIZE + 1),
+            [{"latitude": 59.3, "longitude": 18.0, "createdAt": "yesterday"}],
+            [
+                {"latitude": 59.3, "longitude": 18.0},
+                {"latitude": 59.3, "longitude": 18.0, "createdAt": _fix_time(now, 1)},
+            ],
+            [
+                {"latitude": 59.3, "longitude": 18.0, "createdAt": _fix_time(now, 1)},
+                {"latitude": 59.3, "longitude": 18.0, "createdAt": _fix_time(now, 2)},
+            ],
+            [
+                {
+                    "latitude": 59.3,
+                    "longitude": 18.0,
+                    "createdAt": _fix_time(now + timedelta(hours=1), 0),
+                }
+            ],
+        ]:
+            res_bad = client.post(
+                url,
+                headers=headers(user_id),
+                content_type=JSON,
+                data=json.dumps({"positions": bad_positions}),
+            )
+            assert res_bad.status_code == status.HTTP_400_BAD_REQUEST
+
+        # No position within answer distance of the question.
+        res_miss = client.post(
+            url,
+            headers=headers(user_id),
+            content_type=JSON,
+            data=json.dumps(
+                {
+                    "positions": [
+                        {
+                            "latitude": 59.317,
+                            "longitude": 18.063,
+                            "createdAt": _fix_time(now, 20),
+                        },
+                        {
+                            "latitude": 59.3181,
+                            "longitude": 18.0625,
+                            "createdAt": _fix_time(now, 10),
+                        },
+                    ]
+                }
+            ),
+        )
+        assert res_miss.status_code == status.HTTP_200_OK
+        miss_body = res_miss.get_json()
+        assert not miss_body["isAnswer"]
+        assert miss_body["answerIndex"] is None
+        stored = position_repo.find_member_positions(member_id)
+        assert sorted(p.created_at for p in stored) == [
+            now - timedelta(seconds=20),
+            now - timedelta(seconds=10),
+        ]
+
+        # Second and third positions are both answers, the first one is reported.
+        answer_id = new_id()
+        res_success = client.post(
+            url,
+            headers=headers(user_id),
+            content_type=JSON,
+            data=json.dumps(
+                {
+                    "positions": [
+                        {
+                            "latitude": 59.3181,
+                            "longitude": 18.0625,
+                            "createdAt": _fix_time(now, 3),
+                        },
+                        {
+                            "id": answer_id,
+                            "latitude": 59.318078,
+                            "longitude": 18.063551,
+                            "createdAt": _fix_time(now, 2),
+                        },
+                        {
+                            "latitude": 59.318134,
+                            "longitude": 18.063666,
+                            "createdAt": _fix_time(now, 1),
+                        },
+                    ]
+                }
+            ),
+        )
+        assert res_success.status_code == status.HTTP_200_OK
+        success_body = res_success.get_json()
+        assert success_body["isAnswer"]
+        assert success_body["gameFinished"]
+        assert success_body["answerIndex"] == 1
+        assert success_body["question"]["id"] == question_id
+        assert len(position_repo.find_member_positions(member_id)) == 5
+        answered = GameMemberQuestion.query.filter(
+            GameMemberQuestion.member_id == member_id
+        ).first()
+        assert answered.position_id == answer_id
+
+        res_wrong_user = client.post(
+            url,
+            headers=headers(new_id()),
+            content_type=JSON,
+            data=json.dumps({"positions": [{"latitude": 59.0, "longitude": 18.0}]}),
+        )
+        assert res_wrong_user.status_code == status.HTTP_403_FORBIDDEN
+
+
+def test_add_positions_samples_on_client_time(monkeypatch):
+    monkeypatch.setattr(position_service, "POSITION_MIN_INTERVAL", 5)
+    now = datetime.utcnow()
+    game_id = new_id()
+    user_id = new_id()
+    member_id = new_id()
+    game = Game(
+        id=game_id,
+        name="Test game",
+        created_at=now,
+        started_at=now,
+        members=[
+            GameMember(
+                id=member_id,
+                game_id=game_id,
+                user_id=user_id,
+                is_admin=True,
+                is_ready=True,
+                created_at=now,
+            )
+        ],
+    )
+
+    with TestEnvironment([game]) as client:
+        res = client.post(
+            f"/v1/games/{game_id}/members/{member_id}/positions",
+            headers=headers(user_id),
+            content_type=JSON,
+            data=json.dumps(
+                {
+                    "positions": [
+                        {"latitude": 59.317, "longitude": 18.063, "createdAt": t}
+                        for t in [
+                            _fix_time(now, 30),
+                            _fix_time(now, 28),
+                            _fix_time(now, 20),
+                            _fix_time(now, 17),
+                            _fix_time(now, 10),
+                        ]
+                    ]
+                }
+            ),
+        )
+        assert res.status_code == status.HTTP_200_OK
+        stored = position_repo.find_member_positions(member_id)
+        assert sorted(p.created_at for p in stored) == [
+            now - timedelta(seconds=30),
+            now - timedelta(seconds=20),
+            now - timedelta(seconds=10),
+        ]
+
+
+def test_find_position_context():
+    now = datetime.utcnow()
+    game_id = new_id()
+    member_id = new_id()
+    other_game_member_id = new_id()
+    question_ids = [new_id(), new_id()]
+    questions = [
+        Question(
+            id=question_id,
+            latitude=59.318134,
+            longitude=18.063666,
+            text="t",
+            text_en="t-en",
+            answer="a",
+            answer_en="a-en",
+        )
+        for question_id in question_ids
+    ]
+    game = Game(
+        id=game_id,
+        name="Test game",
+        created_at=now,
+        started_at=now,
+        members=[
+            GameMember(
+                id=member_id,
+                game_id=game_id,
+                user_id=new_id(),
+                is_admin=True,
+                is_ready=True,
+                created_at=now,
+            )
+        ],
+        questions=[
+            GameQuestion(id=1, game_id=game_id, question_id=question_ids[0]),
+            GameQuestion(id=2, game_id=game_id, question_id=question_ids[1]),
+        ],
+    )
+    other_game_id = new_id()
+    other_game = Game(
+        id=other_game_id,
+        name="Other game",
+        created_at=now,
+        members=[
+            GameMember(
+                id=other_game_member_id,
+                game_id=other_game_id,
+                user_id=new_id(),
+                is_admin=True,
+                is_ready=True,
+                created_at=now,
+            )
+        ],
+    )
+    answer_position_id = new_id()
+    answer_position = Position(
+        id=answer_position_id,
+        game_member_id=member_id,
+        latitude=59.318134,
+        longitude=18.063666,
+        created_at=now,
+    )
+    member_questions = [
+        GameMemberQuestion(
+            member_id=member_id,
+            game_question_id=1,
+            position_id=answer_position_id,
+            answered_at=now,
+            created_at=now,
+        ),
+        GameMemberQuestion(
+            member_id=member_id,
+            game_question_id=2,
+            position_id=None,
+            answered_at=None,
+            created_at=now,
+        ),
+    ]
+
+    db_items = [*questions, game, other_game, answer_position, *member_questions]
+    with TestEnvironment(db_items) as client:
+        context = position_repo.find_position_context(game_id, member_id)
+        assert context.game_id == game_id
+        assert context.question_count == 2
+        assert context.member.id == member_id
+        assert context.member.answered_count == 1
+        assert context.member.active_question.question.id == question_ids[1]
+        assert not context.is_cached
+
+        other_member_context = position_repo.find_position_context(
+            game_id, other_game_member_id
+        )
+        assert other_member_context.member.game_id == other_game_id
+        assert other_member_context.member.active_question is None
+        assert other_member_context.member.answered_count == 0
+
+        missing_member_context = position_repo.find_position_context(
+            game_id, new_id()
+        )
+        assert missing_member_context.member is None
+
+        assert position_repo.find_position_context(new_id(), member_id) is None
+
+
+def test_add_position_answers_question_once(monkeypatch):
+    now = datetime.utcnow()
+    game_id = new_id()
+    user_id = new_id()
+    member_id = new_id()
+    question_id = new_id()
+    question = Question(
+        id=question_id,
+        latitude=59.318134,
+        longitude=18.063666,
+        text="t",
+        text_en="t-en",
+        answer="a",
+        answer_en="a-en",
+    )
+    game = Game(
+        id=game_id,
+        name="Test game",
+        created_at=now,
+        started_at=now,
+        members=[
+            GameMember(
+                id=member_id,
+                game_id=game_id,
+                user_id=user_id,
+                is_admin=True,
+                is_ready=True,
+                created_at=now,
+            )
+        ],
+        questions=[GameQuestion(id=1, game_id=game_id, question_id=question_id)],
+    )
+    member_question = GameMemberQuestion(
+        member_id=member_id,
+        game_question_id=1,
+        position_id=None,
+        answered_at=None,
+        created_at=now,
+    )
+
+    with TestEnvironment([question, game, member_question]) as client:
+        # Both requests read the context before either of them answers.
+        context = position_repo.find_position_context(game_id, member_id)
+        monkeypatch.setattr(
+            position_repo, "find_position_context", lambda game_id, member_id: context
+        )
+        bodies = []
+        for _ in range(2):
+            res = client.post(
+                f"/v1/games/{game_id}/members/{member_id}/position",
+                headers=headers(user_id),
+                content_type=JSON,
+                data=json.dumps({"latitude": 59.318078, "longitude": 18.063551}),
+            )
+            assert res.status_code == status.HTTP_200_OK
+            bodies.append(res.get_json())
+
+        assert bodies[0]["isAnswer"] and bodies[0]["gameFinished"]
+        assert not bodies[1]["isAnswer"] and not bodies[1]["gameFinished"]
+        assert len(placement_repo.find_game_placements(game_id)) == 1
+        assert len(position_repo.find_member_positions(member_id)) == 2
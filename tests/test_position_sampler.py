@@ -0,0 +1,91 @@
+# Standard library
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+from typing import List
+
+# Intenal modules
+from tests import new_id
+from app.models import Position
+from app.service import position_sampler
+
+
+def _position(
+    member_id: str, latitude: float, longitude: float, created_at: datetime
+) -> Position:
+    return Position(
+        id=new_id(),
+        game_member_id=member_id,
+        latitude=latitude,
+        longitude=longitude,
+        created_at=created_at,
+    )
+
+
+def test_try_mark_stored():
+    member_id = new_id()
+    now = datetime.utcnow()
+    first = _position(member_id, 59.318134, 18.063666, now)
+    assert position_sampler.try_mark_stored(first, min_distance=20, min_interval=5)
+
+    # 9 meters away and 10 seconds later.
+    close = _position(member_id, 59.318078, 18.063551, now + timedelta(seconds=10))
+    assert not position_sampler.try_mark_stored(
+        close, min_distance=20, min_interval=5
+    )
+
+    # 137 meters away but only 2 seconds later.
+    early = _position(member_id, 59.317, 18.063, now + timedelta(seconds=2))
+    assert not position_sampler.try_mark_stored(
+        early, min_distance=20, min_interval=5
+    )
+
+    # 137 meters away and 10 seconds later.
+    moved = _position(member_id, 59.317, 18.063, now + timedelta(seconds=10))
+    assert position_sampler.try_mark_stored(moved, min_distance=20, min_interval=5)
+
+    # Sampling disabled.
+    assert position_sampler.try_mark_stored(close, min_distance=0, min_interval=0)
+
+    # Other members are sampled independently.
+    other = _position(new_id(), 59.318078, 18.063551, now + timedelta(seconds=1))
+    assert position_sampler.try_mark_stored(other, min_distance=20, min_interval=5)
+
+
+def test_try_mark_stored_is_atomic():
+    member_id = new_id()
+    now = datetime.utcnow()
+    positions = [_position(member_id, 59.317, 18.063, now) for _ in range(8)]
+    with ThreadPoolExecutor(max_workers=8) as executor:
+        stored = list(
+            executor.map(
+                lambda p: position_sampler.try_mark_stored(p, min_distance=20),
+                positions,
+            )
+        )
+    assert stored.count(True) == 1
+
+
+def _track(member_id: str) -> List[Position]:
+    now = datetime.utcnow()
+    return [
+        _position(member_id, 59.317, 18.063, now),
+        _position(member_id, 59.31701, 18.06301, now + timedelta(seconds=10)),
+        _position(member_id, 59.318078, 18.063551, now + timedelta(seconds=20)),
+        _position(member_id, 59.318079, 18.063552, now + timedelta(seconds=30)),
+    ]
+
+
+def test_sample():
+    positions = _track(new_id())
+    stored = position_sampler.sample(positions, keep=None, min_distance=20)
+    assert [p.id for p in stored] == [positions[0].id, positions[2].id]
+
+    answer_positions = _track(new_id())
+    stored_with_answer = position_sampler.sample(
+        answer_positions, keep=1, min_distance=20
+    )
+    assert [p.id for p in stored_with_answer] == [
+        answer_positions[0].id,
+        answer_positions[1].id,
+        answer_positions[2].id,
+    ]
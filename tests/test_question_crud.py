@@ -16,6 +16,8 @@ from app.models import (
     GameMemberQuestion,
     GameQuestion,
 )
+from app.models.dto import CoordinateDTO
+from app.service import distance_util
 
 
 def test_add_question():
@@ -337,3 +339,73 @@ def test_get_members_next_question():
             headers=member_headers,
         )
         assert res_no_position.status_code == status.HTTP_400_BAD_REQUEST
+
+
+def test_find_coordinates_within():
+    user_id = new_id()
+    inside_id = new_id()
+    played_id = new_id()
+    questions = [
+        Question(
+            id=inside_id,
+            latitude=59.318134,
+            longitude=18.063666,
+            text="t1",
+            text_en="t1-en",
+            answer="a1",
+            answer_en="a1-en",
+        ),
+        Question(
+            id=played_id,
+            latitude=59.316556,
+            longitude=18.033478,
+            text="t2",
+            text_en="t2-en",
+            answer="a2",
+            answer_en="a2-en",
+        ),
+        Question(
+            id=new_id(),
+            latitude=57.708870,
+            longitude=11.974560,
+            text="t3",
+            text_en="t3-en",
+            answer="a3",
+            answer_en="a3-en",
+        ),
+    ]
+    old_game_id = new_id()
+    old_game = Game(
+        id=old_game_id,
+        name="Old game",
+        members=[GameMember(id=new_id(), game_id=old_game_id, user_id=user_id)],
+        questions=[GameQuestion(game_id=old_game_id, question_id=played_id)],
+    )
+    other_game_id = new_id()
+    other_game = Game(
+        id=other_game_id,
+        name="Other game",
+        members=[GameMember(id=new_id(), game_id=other_game_id, user_id=new_id())],
+        questions=[GameQuestion(game_id=other_game_id, question_id=inside_id)],
+    )
+    game_id = new_id()
+    game = Game(
+        id=game_id,
+        name="New game",
+        members=[GameMember(id=new_id(), game_id=game_id, user_id=user_id)],
+    )
+    origin = CoordinateDTO(latitude=59.318329, longitude=18.042192)
+    bounds = distance_util.bounding_box(origin, 9000)
+    with TestEnvironment(questions + [old_game, other_game, game]):
+        candidates = question_repo.find_coordinates_within(bounds)
+        assert {c.id for c in candidates} == {inside_id, played_id}
+
+        candidates = question_repo.find_coordinates_within(bounds, game_id)
+        assert len(candidates) == 1
+        assert candidates[0].id == inside_id
+        assert candidates[0].latitude == 59.318134
+        assert candidates[0].longitude == 18.063666
+
+        played = question_repo.find_played_question_ids([user_id, new_id()])
+        assert played[user_id] == [played_id]
+        assert len(played) == 2
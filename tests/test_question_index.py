@@ -0,0 +1,135 @@
+# Standard library
+from datetime import datetime, timedelta
+
+# 3rd party modules
+import numpy as np
+
+# Intenal modules
+from tests import TestEnvironment, insert_items
+from app.models import Question
+from app.models.dto import CoordinateDTO, QuestionCoordinateDTO
+from app.service import neighbour_graph, question_index, question_snapshot
+from app.service.question_index import QuestionIndex
+
+
+def test_find_within():
+    origin = CoordinateDTO(latitude=59.318329, longitude=18.042192)
+    index = QuestionIndex()
+    index.add("q-origin", origin)
+    index.add(
+        "q-too-close", CoordinateDTO(latitude=59.316556, longitude=18.033478)
+    )  # 532 meters from origin
+    index.add(
+        "q-within", CoordinateDTO(latitude=59.318134, longitude=18.063666)
+    )  # 1218 meters from origin
+    index.add(
+        "q-too-far", CoordinateDTO(latitude=59.326934, longitude=18.103433)
+    )  # 3603 meters from origin
+    index.add("q-other-city", CoordinateDTO(latitude=57.708870, longitude=11.974560))
+    assert len(index) == 5
+
+    rows = index.find_within(origin, min_dist=1000, max_dist=3000)
+    assert [index.question_id(r) for r in rows] == ["q-within"]
+
+    rows = index.find_within(origin, min_dist=0, max_dist=3000)
+    assert [index.question_id(r) for r in rows] == ["q-origin", "q-too-close", "q-within"]
+
+    rows = index.find_within(origin, min_dist=1000, max_dist=4000)
+    assert [index.question_id(r) for r in rows] == ["q-within", "q-too-far"]
+
+    assert index.rows_of(["q-within", "q-missing"]) == {2}
+    assert index.coordinate(2) == CoordinateDTO(latitude=59.318134, longitude=18.063666)
+
+
+def test_add_grows_index():
+    index = QuestionIndex()
+    origin = CoordinateDTO(latitude=59.318329, longitude=18.042192)
+    for i in range(2500):
+        index.add(f"q-{i}", CoordinateDTO(latitude=59.0 + i * 0.0001, longitude=18.0))
+    assert len(index) == 2500
+    assert index.question_id(2499) == "q-2499"
+    assert index.coordinate(2499).latitude == 59.0 + 2499 * 0.0001
+    assert len(index.find_within(origin, min_dist=0, max_dist=1000)) == 0
+
+
+def test_neighbours():
+    index = QuestionIndex(min_link=1000, max_link=3000)
+    origin = index.add("q-origin", CoordinateDTO(latitude=59.318329, longitude=18.042192))
+    too_close = index.add(
+        "q-too-close", CoordinateDTO(latitude=59.316556, longitude=18.033478)
+    )  # 532 meters from origin
+    within = index.add(
+        "q-within", CoordinateDTO(latitude=59.318134, longitude=18.063666)
+    )  # 1218 meters from origin
+    too_far = index.add(
+        "q-too-far", CoordinateDTO(latitude=59.326934, longitude=18.103433)
+    )  # 3603 meters from origin
+
+    assert index.neighbours(origin).tolist() == [within]
+    assert index.neighbours(within).tolist() == [origin, too_close, too_far]
+    assert index.neighbours(too_close).tolist() == [within]
+    assert index.neighbours(too_far).tolist() == [within]
+
+
+def test_build_index_links_same_neighbours_as_added_rows():
+    random = np.random.RandomState(7)
+    questions = [
+        QuestionCoordinateDTO(
+            id=f"q-{i}",
+            latitude=59.3 + random.uniform(-0.05, 0.05),
+            longitude=18.0 + random.uniform(-0.1, 0.1),
+        )
+        for i in range(300)
+    ]
+    questions.append(
+        QuestionCoordinateDTO(id="q-other-city", latitude=57.70887, longitude=11.97456)
+    )
+    added = QuestionIndex()
+    for question in questions[:200]:
+        added.add(question.id, question.coordinate())
+    built = question_index.build_index(questions[:200])
+    for question in questions[200:]:
+        added.add(question.id, question.coordinate())
+        built.add(question.id, question.coordinate())
+
+    assert len(built) == len(added) == 301
+    for row in range(len(added)):
+        assert built.neighbours(row).tolist() == added.neighbours(row).tolist()
+    assert sum(len(built.neighbours(row)) for row in range(len(built))) > 0
+    assert len(built.neighbours(300)) == 0
+
+
+def test_neighbour_graph_of_empty_catalog():
+    indptr, indices = neighbour_graph.build(np.array([]), np.array([]), 1000, 3000)
+    assert indptr.tolist() == [0]
+    assert len(indices) == 0
+
+
+def test_index_follows_appended_and_compacted_snapshot(monkeypatch):
+    monkeypatch.setattr(question_snapshot, "_MIN_DELTA_ROWS", 2)
+    now = datetime.utcnow()
+    questions = [
+        Question(
+            id=f"q-{i}",
+            latitude=59.3,
+            longitude=18.0 + i * 0.02,
+            text=f"t{i}",
+            text_en=f"t{i}-en",
+            answer=f"a{i}",
+            answer_en=f"a{i}-en",
+            created_at=now + timedelta(seconds=i),
+        )
+        for i in range(6)
+    ]
+    with TestEnvironment(questions[:2]):
+        index = question_index.get_index()
+        assert len(index) == 2
+        for question in questions[2:]:
+            insert_items([question])
+            question_index.add_question(question)
+            assert question_index.get_index() is index
+
+        assert question_snapshot.find_current().base_count == 5
+        assert len(index) == 6
+        assert index.neighbours(2).tolist() == [0, 1, 3, 4]
+        assert index.neighbours(5).tolist() == [3, 4]
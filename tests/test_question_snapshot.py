@@ -0,0 +1,73 @@
+# Standard library
+from datetime import datetime
+
+# Intenal modules
+from app.models.dto import QuestionCoordinateDTO
+from app.service import question_snapshot
+
+
+def test_write_append_and_load():
+    assert question_snapshot.find_current() is None
+
+    first_version = (2, datetime(2019, 6, 9, 14, 58, 6, 518857))
+    questions = [
+        QuestionCoordinateDTO(id="q-1", latitude=59.318134, longitude=18.063666),
+        QuestionCoordinateDTO(id="q-2", latitude=59.316556, longitude=18.033478),
+    ]
+    header = question_snapshot.write(first_version, lambda: questions)
+    assert header.generation == 1
+    assert header.count == 2
+    assert question_snapshot.find_current() == header
+
+    # Writing the same catalog version again reuses the current snapshot.
+    assert question_snapshot.write(first_version, lambda: []) == header
+
+    second_version = (3, datetime(2019, 6, 10, 10, 0, 0, 1))
+    appended = question_snapshot.append(
+        header,
+        QuestionCoordinateDTO(id="q-3", latitude=59.316709, longitude=17.984827),
+        second_version,
+    )
+    assert appended is not None
+    assert appended.generation == 1
+    assert appended.count == 3
+    assert appended.catalog_version == second_version
+    assert appended.base_count == 2
+    assert question_snapshot.append(header, questions[0], second_version) is None
+
+    # Appended questions are kept in a delta beside the base columns and graph.
+    snapshot = question_snapshot.load(appended)
+    assert [i.decode() for i in snapshot.ids] == ["q-1", "q-2"]
+    assert snapshot.latitudes.tolist() == [59.318134, 59.316556]
+    assert snapshot.longitudes.tolist() == [18.063666, 18.033478]
+    assert snapshot.appended == [
+        QuestionCoordinateDTO(id="q-3", latitude=59.316709, longitude=17.984827)
+    ]
+    indptr, indices = snapshot.graph
+    assert indptr.tolist() == [0, 1, 2]
+    assert indices.tolist() == [1, 0]
+
+    rewritten = question_snapshot.write((0, None), lambda: [])
+    assert rewritten.generation == 2
+    assert rewritten.count == 0
+    assert len(question_snapshot.load(rewritten).ids) == 0
+
+
+def test_append_compacts_large_delta(monkeypatch):
+    monkeypatch.setattr(question_snapshot, "_MIN_DELTA_ROWS", 2)
+    questions = [
+        QuestionCoordinateDTO(id=f"q-{i}", latitude=59.3, longitude=18.0 + i * 0.02)
+        for i in range(5)
+    ]
+    header = question_snapshot.write((2, None), lambda: questions[:2])
+    for i, question in enumerate(questions[2:], start=3):
+        header = question_snapshot.append(header, question, (i, None))
+
+    assert header.generation == 1
+    assert header.count == header.base_count == 5
+    snapshot = question_snapshot.load(header)
+    assert [i.decode() for i in snapshot.ids] == [q.id for q in questions]
+    assert snapshot.appended == []
+    indptr, indices = snapshot.graph
+    # Questions 1.1 km apart are linked to the questions up to two rows away.
+    assert indices[indptr[2] : indptr[3]].tolist() == [0, 1, 3, 4]
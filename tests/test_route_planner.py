@@ -0,0 +1,54 @@
+# Intenal modules
+from app.models.dto import CoordinateDTO
+from app.service import route_planner
+from app.service.question_index import QuestionIndex
+from app.service.seen_questions import QuestionBitset
+
+
+def _line_index() -> QuestionIndex:
+    """Questions placed along a parallel, 0.02 degrees (about 1.1 km) apart."""
+    index = QuestionIndex(min_link=1000, max_link=3000)
+    for i in range(6):
+        index.add(f"q-{i}", CoordinateDTO(latitude=59.3, longitude=18.0 + i * 0.02))
+    return index
+
+
+def test_plan_route():
+    index = _line_index()
+    origin = CoordinateDTO(latitude=59.3, longitude=17.98)
+    first_hop = index.find_within(origin, 1000, 3000)
+    assert first_hop == [0, 1]
+
+    for _ in range(20):
+        route = route_planner.plan_route(
+            index, first_hop, excluded=QuestionBitset(), length=4, min_spacing=500
+        )
+        assert route is not None
+        assert len(route) == 4
+        assert len(set(route)) == 4
+        for prev, row in zip(route, route[1:]):
+            assert row in index.neighbours(prev)
+
+    route = route_planner.plan_route(
+        index, first_hop, excluded=QuestionBitset.of([1, 2]), length=2, min_spacing=500
+    )
+    assert route is None
+
+    route = route_planner.plan_route(
+        index, first_hop, excluded=QuestionBitset.of([2]), length=2, min_spacing=500
+    )
+    assert route in ([0, 1], [1, 0], [1, 3])
+
+
+def test_plan_route_with_too_small_budget():
+    index = _line_index()
+    route = route_planner.plan_route(
+        index, [0], excluded=QuestionBitset(), length=6, min_spacing=500, budget=2
+    )
+    assert route is None
+
+    route = route_planner.plan_route(
+        index, [0], excluded=QuestionBitset(), length=6, min_spacing=500, budget=1000
+    )
+    assert route is not None
+    assert sorted(route) == [0, 1, 2, 3, 4, 5]
@@ -0,0 +1,87 @@
+# Standard library
+from datetime import datetime
+
+# 3rd party modules
+import numpy as np
+
+# Intenal modules
+from tests import TestEnvironment, insert_items, new_id
+from app.models import Game, GameMember, GameQuestion, Question
+from app.models.dto import QuestionCoordinateDTO
+from app.service import question_index, seen_questions
+from app.service.seen_questions import QuestionBitset
+
+
+def test_question_bitset():
+    empty = QuestionBitset()
+    assert len(empty) == 0
+    assert 0 not in empty
+    assert list(empty) == []
+
+    first = QuestionBitset.of([0, 3, 70])
+    second = QuestionBitset.of([3, 5])
+    assert len(first) == 3
+    assert 3 in first and 70 in first
+    assert 5 not in first and 69 not in first
+
+    union = first | second
+    assert list(union) == [0, 3, 5, 70]
+    assert len(union) == 4
+    assert list(first) == [0, 3, 70]
+    assert np.int64(70) in first and -1 not in first and "3" not in first
+
+    assert list(first.contains_many(np.array([0, 1, 3, 70, 71, 1000]))) == [
+        True,
+        False,
+        True,
+        True,
+        False,
+        False,
+    ]
+    assert len(empty.contains_many(np.array([], dtype=np.int64))) == 0
+
+
+def _started_game(
+    user_id: str, game_question_id: int, question_id: str, now: datetime
+) -> Game:
+    game_id = new_id()
+    return Game(
+        id=game_id,
+        name=f"game-{game_question_id}",
+        created_at=now,
+        started_at=now,
+        members=[
+            GameMember(id=new_id(), game_id=game_id, user_id=user_id, created_at=now)
+        ],
+        questions=[
+            GameQuestion(id=game_question_id, game_id=game_id, question_id=question_id)
+        ],
+    )
+
+
+def test_find_seen_rereads_games_started_by_other_workers():
+    now = datetime.utcnow()
+    user_id = new_id()
+    questions = [
+        Question(
+            id=new_id(),
+            latitude=59.3,
+            longitude=18.0 + i * 0.02,
+            text=f"t{i}",
+            text_en=f"t{i}-en",
+            answer=f"a{i}",
+            answer_en=f"a{i}-en",
+        )
+        for i in range(3)
+    ]
+    index = question_index.build_index(
+        QuestionCoordinateDTO(id=q.id, latitude=q.latitude, longitude=q.longitude)
+        for q in questions
+    )
+
+    with TestEnvironment([*questions, _started_game(user_id, 1, questions[0].id, now)]):
+        assert list(seen_questions.find_seen([user_id], index)) == [0]
+
+        # Started by another worker, which cannot update the cache of this one.
+        insert_items([_started_game(user_id, 2, questions[2].id, now)])
+        assert list(seen_questions.find_seen([user_id], index)) == [0, 2]
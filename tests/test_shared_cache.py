@@ -0,0 +1,45 @@
+# Standard library
+import threading
+import time
+
+# Intenal modules
+from app.service.shared_cache import SharedCache
+
+
+def test_shared_cache_get_and_set(tmp_path):
+    cache = SharedCache(str(tmp_path / "cache.sqlite"), maxsize=10, ttl=60)
+    assert cache.get("a") is None
+
+    cache.set_many({"a": "value-a", "b": "value-b"})
+    assert cache.get("a") == "value-a"
+    assert cache.get_many(["a", "b", "c"]) == {"a": "value-a", "b": "value-b"}
+
+    cache.set_many({"a": "new-value-a"})
+    assert cache.get("a") == "new-value-a"
+
+    other_cache = SharedCache(str(tmp_path / "cache.sqlite"), maxsize=10, ttl=60)
+    assert other_cache.get("b") == "value-b"
+
+    values = {}
+    thread = threading.Thread(target=lambda: values.update(cache.get_many(["a"])))
+    thread.start()
+    thread.join()
+    assert values == {"a": "new-value-a"}
+
+    cache.clear()
+    assert other_cache.get("a") is None
+
+
+def test_shared_cache_expiry_and_eviction(tmp_path):
+    cache = SharedCache(str(tmp_path / "cache.sqlite"), maxsize=2, ttl=0.05)
+    cache.set_many({"a": "value-a"})
+    time.sleep(0.1)
+    assert cache.get("a") is None
+
+    cache = SharedCache(str(tmp_path / "cache.sqlite"), maxsize=2, ttl=60)
+    cache.set_many({"a": "value-a"})
+    time.sleep(0.01)
+    cache.set_many({"b": "value-b"})
+    time.sleep(0.01)
+    cache.set_many({"c": "value-c"})
+    assert cache.get_many(["a", "b", "c"]) == {"b": "value-b", "c": "value-c"}
@@ -0,0 +1,89 @@
+# Standard library
+import threading
+import time
+from typing import Dict, List
+
+# Intenal modules
+from app.service.single_flight import SingleFlight
+
+
+def test_single_flight_shares_result():
+    single_flight = SingleFlight()
+    calls: List[int] = []
+    results: List[str] = []
+    started = threading.Event()
+
+    def slow_fetch() -> str:
+        calls.append(1)
+        started.set()
+        time.sleep(0.1)
+        return "user"
+
+    def lookup() -> None:
+        results.append(single_flight.do("user-1", slow_fetch))
+
+    leader = threading.Thread(target=lookup)
+    leader.start()
+    started.wait()
+    followers = [threading.Thread(target=lookup) for _ in range(4)]
+    for follower in followers:
+        follower.start()
+    for thread in [leader, *followers]:
+        thread.join()
+
+    assert len(calls) == 1
+    assert results == ["user"] * 5
+    assert single_flight.do("user-1", lambda: "new user") == "new user"
+
+
+def test_single_flight_shares_error():
+    single_flight = SingleFlight()
+    errors: List[Exception] = []
+    started = threading.Event()
+
+    def failing_fetch() -> str:
+        started.set()
+        time.sleep(0.1)
+        raise ValueError("User service unavailable")
+
+    def lookup() -> None:
+        try:
+            single_flight.do("user-1", failing_fetch)
+        except ValueError as e:
+            errors.append(e)
+
+    leader = threading.Thread(target=lookup)
+    leader.start()
+    started.wait()
+    follower = threading.Thread(target=lookup)
+    follower.start()
+    leader.join()
+    follower.join()
+
+    assert len(errors) == 2
+    assert errors[0] is errors[1]
+
+
+def test_single_flight_coalesces_overlapping_batches_per_key():
+    single_flight = SingleFlight()
+    calls: List[List[str]] = []
+    leader_results: List[Dict[str, str]] = []
+    started = threading.Event()
+
+    def fetch(keys: List[str]) -> Dict[str, str]:
+        calls.append(keys)
+        started.set()
+        time.sleep(0.1)
+        return {key: key.upper() for key in keys if key != "missing"}
+
+    leader = threading.Thread(
+        target=lambda: leader_results.append(single_flight.do_many(["a", "b"], fetch))
+    )
+    leader.start()
+    started.wait()
+    results = single_flight.do_many(["b", "c", "missing"], fetch)
+    leader.join()
+
+    assert calls == [["a", "b"], ["c", "missing"]]
+    assert results == {"b": "B", "c": "C"}
+    assert leader_results == [{"a": "A", "b": "B"}]
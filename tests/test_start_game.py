@@ -3,15 +3,19 @@ import json
 from datetime import datetime, timedelta
 
 # 3rd party modules
+import pytest
 from crazerace.http import status
 
 # Intenal modules
 from tests import TestEnvironment, JSON, headers, new_id
 from app.models import Game, GameMember, GameQuestion, Question
 from app.repository import game_repo
+from app.service import question_service, question_snapshot
 
 
-def test_start_game():
+@pytest.mark.parametrize("index_enabled", [True, False])
+def test_start_game(index_enabled, monkeypatch):
+    monkeypatch.setattr(question_service, "QUESTION_INDEX_ENABLED", index_enabled)
     two_hours_ago: datetime = datetime.utcnow() - timedelta(hours=2)
     one_hour_ago: datetime = datetime.utcnow() - timedelta(hours=1)
     now = datetime.utcnow()
@@ -140,6 +144,8 @@ def test_start_game():
         assert game.started_at is not None
         assert game.started_at > now and game.started_at <= datetime.utcnow()
         assert game.ended_at == None
+        # Without the index only the questions around the start are queried.
+        assert (question_snapshot.find_current() is not None) == index_enabled
 
 
 def test_start_game_with_too_few_questions():
@@ -0,0 +1,51 @@
+# Standard library
+import uuid
+
+# 3rd party modules
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.schema import CreateTable
+
+# Intenal modules
+from app.models import Game, GameMemberQuestion, Position
+from app.models.types import UUID
+
+
+def test_uuid_binds_lowercase_uuid_on_postgres():
+    dialect = postgresql.dialect()
+    process = Game.__table__.c.id.type.bind_processor(dialect)
+    value = "0A1B2C3D-4E5F-4A6B-8C7D-9E0F1A2B3C4D"
+    assert process(value) == value.lower()
+    assert process(value.replace("-", "")) == value.lower()
+    assert process("asd123") is None
+    assert process(None) is None
+
+
+def test_uuid_binds_strings_as_is_on_other_databases():
+    process = UUID().bind_processor(sqlite.dialect())
+    bind = process if process else lambda value: value
+    assert bind("asd123") == "asd123"
+
+
+def test_uuid_returns_lowercase_string_on_postgres():
+    dialect = postgresql.dialect()
+    process = Game.__table__.c.id.type.result_processor(dialect, None)
+    value = uuid.uuid4()
+    assert process(value) == str(value)
+    assert process(str(value).upper()) == str(value)
+    assert process(None) is None
+
+
+def test_uuid_columns_are_native_on_postgres():
+    dialect = postgresql.dialect()
+    position_ddl = str(CreateTable(Position.__table__).compile(dialect=dialect))
+    assert "id UUID NOT NULL" in position_ddl
+    assert "game_member_id UUID NOT NULL" in position_ddl
+
+    member_question_ddl = str(
+        CreateTable(GameMemberQuestion.__table__).compile(dialect=dialect)
+    )
+    assert "member_id UUID NOT NULL" in member_question_ddl
+    assert "position_id UUID" in member_question_ddl
+
+    sqlite_ddl = str(CreateTable(Position.__table__).compile(dialect=sqlite.dialect()))
+    assert "id VARCHAR(50) NOT NULL" in sqlite_ddl
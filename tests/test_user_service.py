@@ -0,0 +1,153 @@
+# Standard library
+import time
+
+# 3rd party modules
+import pytest
+import requests
+import requests_mock
+from cachetools import TTLCache
+from crazerace.http.error import BadGatewayError
+from flask import request
+
+# Intenal modules
+from tests import new_id
+from app import app
+from app.config import SERVER_NAME, USER_SERVICE_URL, USER_CIRCUIT_MIN_CALLS
+from app.service import user_service
+from app.service.circuit_breaker import CircuitBreaker, CLOSED, OPEN
+
+
+@pytest.fixture(autouse=True)
+def reset_circuit_breaker():
+    user_service._breaker.reset()
+    yield
+    user_service._breaker.reset()
+
+
+def _user(user_id: str, username: str) -> dict:
+    return {"id": user_id, "username": username, "createdAt": "2019-01-01 12:12:12.222"}
+
+
+def test_fetch_user_serves_stale_user_while_refreshing(monkeypatch):
+    monkeypatch.setattr(user_service, "USER_CACHE_SOFT_TTL", 0)
+    user_id = new_id()
+    with requests_mock.mock() as m, app.test_request_context():
+        request.user_id = user_id
+        request.role = "USER"
+        m.get(
+            f"{USER_SERVICE_URL}/v1/users/{user_id}", json=_user(user_id, "Old name")
+        )
+        m.get(
+            f"{USER_SERVICE_URL}/v1/users?ids={user_id}",
+            json=[_user(user_id, "New name")],
+        )
+        assert user_service.fetch_user(user_id).username == "Old name"
+        assert user_service.fetch_user(user_id).username == "Old name"
+
+        deadline = time.time() + 2
+        while user_service.fetch_user(user_id).username != "New name":
+            assert time.time() < deadline
+            time.sleep(0.01)
+
+        # Lets the last refresh finish before the mock is removed, so that it
+        # does not call the user service during later tests.
+        while user_service._refreshing:
+            assert time.time() < deadline
+            time.sleep(0.01)
+
+
+def test_fetch_user_caches_failures():
+    user_id = new_id()
+    url = f"{USER_SERVICE_URL}/v1/users/{user_id}"
+    with requests_mock.mock() as m, app.test_request_context():
+        request.user_id = user_id
+        request.role = "USER"
+        m.get(url, exc=requests.exceptions.ConnectTimeout)
+        with pytest.raises(BadGatewayError):
+            user_service.fetch_user(user_id)
+
+        m.get(url, json=_user(user_id, "Username"))
+        with pytest.raises(BadGatewayError):
+            user_service.fetch_user(user_id)
+        assert m.call_count == 1
+
+
+def test_fetch_users_fetches_users_besides_recently_failed(monkeypatch):
+    failed_id = new_id()
+    other_id = new_id()
+    with requests_mock.mock() as m, app.test_request_context():
+        request.user_id = failed_id
+        request.role = "USER"
+        m.get(f"{USER_SERVICE_URL}/v1/users/{failed_id}", json=_user(failed_id, "Old"))
+        m.get(f"{USER_SERVICE_URL}/v1/users/{other_id}", json=_user(other_id, "Other"))
+        assert user_service.fetch_user(failed_id).username == "Old"
+
+        monkeypatch.setattr(user_service, "_cache", TTLCache(maxsize=10, ttl=60))
+        monkeypatch.setattr(user_service, "_failed", TTLCache(maxsize=10, ttl=60))
+        user_service._mark_failed([failed_id])
+        users = user_service.fetch_users([failed_id, other_id])
+        assert users[failed_id].username == "Old"
+        assert users[other_id].username == "Other"
+        assert m.call_count == 2
+        assert m.last_request.url.endswith(other_id)
+
+
+def test_fetch_user_calls_user_service_on_behalf_of_caller():
+    user_id = new_id()
+    with requests_mock.mock() as m, app.test_request_context():
+        request.user_id = user_id
+        request.role = "USER"
+        m.get(f"{USER_SERVICE_URL}/v1/users/{user_id}", json=_user(user_id, "Name"))
+        assert user_service.fetch_user(user_id).username == "Name"
+        headers = m.last_request.headers
+        assert headers["Authorization"].startswith("Bearer ")
+        assert headers["User-Agent"] == SERVER_NAME
+
+
+def test_fetch_user_serves_last_known_user_while_circuit_is_open(monkeypatch):
+    breaker = CircuitBreaker(
+        "test",
+        failure_rate=0.5,
+        slow_call_duration=10,
+        min_calls=1,
+        window=60,
+        open_duration=60,
+    )
+    monkeypatch.setattr(user_service, "_breaker", breaker)
+    user_id = new_id()
+    url = f"{USER_SERVICE_URL}/v1/users/{user_id}"
+    with requests_mock.mock() as m, app.test_request_context():
+        request.user_id = user_id
+        request.role = "USER"
+        m.get(url, json=_user(user_id, "Username"))
+        assert user_service.fetch_user(user_id).username == "Username"
+
+        monkeypatch.setattr(user_service, "_cache", TTLCache(maxsize=10, ttl=60))
+        monkeypatch.setattr(user_service, "_failed", TTLCache(maxsize=10, ttl=60))
+        m.get(url, exc=requests.exceptions.ConnectTimeout)
+        assert user_service.fetch_user(user_id).username == "Username"
+        assert breaker.state == OPEN
+
+        monkeypatch.setattr(user_service, "_failed", TTLCache(maxsize=10, ttl=60))
+        assert user_service.fetch_user(user_id).username == "Username"
+        assert m.call_count == 2
+
+
+def test_fetch_user_does_not_open_circuit_on_client_errors():
+    with requests_mock.mock() as m, app.test_request_context():
+        request.user_id = new_id()
+        request.role = "USER"
+        for _ in range(USER_CIRCUIT_MIN_CALLS):
+            user_id = new_id()
+            m.get(f"{USER_SERVICE_URL}/v1/users/{user_id}", status_code=404)
+            with pytest.raises(BadGatewayError):
+                user_service.fetch_user(user_id)
+        assert m.call_count == USER_CIRCUIT_MIN_CALLS
+        assert user_service._breaker.state == CLOSED
+
+        for _ in range(USER_CIRCUIT_MIN_CALLS):
+            user_id = new_id()
+            m.get(f"{USER_SERVICE_URL}/v1/users/{user_id}", status_code=503)
+            with pytest.raises(BadGatewayError):
+                user_service.fetch_user(user_id)
+        assert user_service._breaker.state == OPEN